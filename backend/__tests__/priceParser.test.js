@@ -0,0 +1,209 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { parsePriceBuffer, parsePriceFile } = require('../priceParser');
+
+// The line-split parser the byte parser replaced, kept as the reference behaviour.
+// Two differences are intended: dates in YYYYMMDD or YYYY-MM-DD form become YYYYMMDD
+// integers, and each line is trimmed before its fields are split.
+function referenceParse(text, symbol) {
+    const lines = text.trim().split('\n');
+    const headers = lines[0].split(',');
+
+    const dateIndex = headers.findIndex(h => h.toLowerCase().includes('date'));
+    const openIndex = headers.findIndex(h => h.toLowerCase().includes('open'));
+    const highIndex = headers.findIndex(h => h.toLowerCase().includes('high'));
+    const lowIndex = headers.findIndex(h => h.toLowerCase().includes('low'));
+    const closeIndex = headers.findIndex(h => h.toLowerCase().includes('close'));
+    const volumeIndex = headers.findIndex(h => h.toLowerCase().includes('vol'));
+
+    if (dateIndex === -1 || closeIndex === -1) {
+        return { rows: [], error: 'Missing required columns (date, close)' };
+    }
+
+    const dataRows = lines.slice(1).filter(line => line.trim() && !line.includes('N/A'));
+    if (dataRows.length === 0) {
+        return { rows: [], error: 'No valid data rows found' };
+    }
+
+    const rows = [];
+    for (const line of dataRows) {
+        const values = line.trim().split(',');
+
+        if (values.length >= Math.max(dateIndex, openIndex, highIndex, lowIndex, closeIndex, volumeIndex) + 1) {
+            const date = referenceDate(values[dateIndex]);
+            const open = parseFloat(values[openIndex]) || null;
+            const high = parseFloat(values[highIndex]) || null;
+            const low = parseFloat(values[lowIndex]) || null;
+            const close = parseFloat(values[closeIndex]) || null;
+            const volume = parseInt(values[volumeIndex]) || null;
+
+            if (date && close && !isNaN(close)) {
+                rows.push([symbol, date, open, high, low, close, volume]);
+            }
+        }
+    }
+
+    return { rows, error: null };
+}
+
+function referenceDate(text) {
+    if (/^\d{8}$/.test(text)) return Number(text);
+    const match = /^(\d{4})-(\d{2})-(\d{2})$/.exec(text);
+    return match ? Number(match[1]) * 10000 + Number(match[2]) * 100 + Number(match[3]) : text;
+}
+
+function withTempFile(content, callback) {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'price-parser-'));
+    const filePath = path.join(dir, 'prices.txt');
+    fs.writeFileSync(filePath, content, 'latin1');
+    try {
+        return callback(filePath);
+    } finally {
+        fs.rmSync(dir, { recursive: true, force: true });
+    }
+}
+
+// Parse the text from a buffer and from disk and check both against the reference parser
+function expectMatchesReference(text, symbol = 'TEST') {
+    const expected = referenceParse(text, symbol);
+    expect(parsePriceBuffer(Buffer.from(text, 'latin1'), symbol)).toEqual(expected);
+    withTempFile(text, filePath => {
+        expect(parsePriceFile(filePath, symbol)).toEqual(expected);
+    });
+    return expected;
+}
+
+const STOOQ_HEADER = '<TICKER>,<PER>,<DATE>,<TIME>,<OPEN>,<HIGH>,<LOW>,<CLOSE>,<VOL>,<OPENINT>';
+
+describe('priceParser', () => {
+    test('parses Stooq rows with YYYYMMDD dates', () => {
+        const { rows } = expectMatchesReference([
+            STOOQ_HEADER,
+            'QQQ.US,D,19990310,000000,51.125,51.156,50.281,51.063,5232000,0',
+            'QQQ.US,D,19990311,000000,51.438,51.734,50.313,51.313,9688600,0'
+        ].join('\n'));
+
+        expect(rows).toEqual([
+            ['TEST', 19990310, 51.125, 51.156, 50.281, 51.063, 5232000],
+            ['TEST', 19990311, 51.438, 51.734, 50.313, 51.313, 9688600]
+        ]);
+    });
+
+    test('converts ISO dates and keeps other date shapes as text', () => {
+        const { rows } = expectMatchesReference([
+            'Date,Open,High,Low,Close,Volume',
+            '2020-01-02,1,2,0.5,1.5,100',
+            '1/3/2020,1,2,0.5,1.5,100',
+            '2020/01/06,1,2,0.5,1.5,100'
+        ].join('\n'));
+
+        expect(rows.map(row => row[1])).toEqual([20200102, '1/3/2020', '2020/01/06']);
+    });
+
+    test('handles CRLF line endings', () => {
+        const { rows } = expectMatchesReference([
+            'Date,Open,High,Low,Close,Volume',
+            '20200102,1,2,0.5,1.5,100',
+            '20200103,1.25,2.5,0.75,1.75,200',
+            ''
+        ].join('\r\n'));
+
+        expect(rows).toHaveLength(2);
+        expect(rows[1]).toEqual(['TEST', 20200103, 1.25, 2.5, 0.75, 1.75, 200]);
+    });
+
+    test('reports a header-only file', () => {
+        expect(expectMatchesReference('Date,Open,High,Low,Close,Volume\n')).toEqual({
+            rows: [],
+            error: 'No valid data rows found'
+        });
+    });
+
+    test('reports missing required columns', () => {
+        expect(expectMatchesReference('Day,Open,High,Low,Volume\n20200102,1,2,0.5,100')).toEqual({
+            rows: [],
+            error: 'Missing required columns (date, close)'
+        });
+    });
+
+    test('skips rows without a usable close and rows containing N/A', () => {
+        const { rows } = expectMatchesReference([
+            'Date,Open,High,Low,Close,Volume',
+            '20200102,1,2,0.5,,100',
+            '20200103,1,2,0.5,0,100',
+            '20200106,1,2,N/A,1.5,100',
+            '20200107,1,2,0.5,1.5',
+            '20200108,1,2,0.5,1.5,100'
+        ].join('\n'));
+
+        expect(rows).toEqual([['TEST', 20200108, 1, 2, 0.5, 1.5, 100]]);
+    });
+
+    test('splits quoted fields on commas like the line-split parser', () => {
+        const { rows } = expectMatchesReference([
+            'Date,Open,High,Low,Close,Volume',
+            '"20200102","1.5",2,0.5,1.5,100',
+            '20200103,1,2,0.5,"1,5",100',
+            '20200106,1,2,0.5,1.5,"1,000"'
+        ].join('\n'));
+
+        // The split "1,5" close leaves '"1' as the close, so that row is dropped
+        expect(rows.map(row => row[1])).toEqual(['"20200102"', 20200106]);
+        expect(rows[0][2]).toBeNull();
+        expect(rows[1][6]).toBeNull();
+    });
+
+    test('matches parseFloat on both sides of the exact-digit cutoff', () => {
+        const decimals = [
+            '123456789012345',
+            '1234567890.12345',
+            '0.000000000000001',
+            '1234567890123456',
+            '12345678901.234567',
+            '0.1000000000000000055511151231257827',
+            '-98765.4321',
+            '+42.5',
+            '1e3',
+            '.5',
+            '5.'
+        ];
+        const text = ['Date,Open,High,Low,Close,Volume']
+            .concat(decimals.map((value, i) => `${20200101 + i},${value},${value},${value},${value},${value}`))
+            .join('\n');
+
+        const { rows } = expectMatchesReference(text);
+        rows.forEach((row, i) => {
+            expect(Object.is(row[5], parseFloat(decimals[i]) || null)).toBe(true);
+            expect(row[6]).toBe(parseInt(decimals[i]) || null);
+        });
+    });
+
+    test('carries a record split across the read buffer boundary', () => {
+        const lines = ['Date,Open,High,Low,Close,Volume'];
+        let size = lines[0].length + 1;
+        for (let i = 0; size < 3 * 64 * 1024; i++) {
+            const line = `${20000101 + i},${(100 + i / 7).toFixed(4)},${(101 + i / 7).toFixed(4)},${(99 + i / 7).toFixed(4)},${(100.5 + i / 7).toFixed(4)},${1000 + i}`;
+            lines.push(line);
+            size += line.length + 1;
+        }
+        const text = lines.join('\n');
+
+        // The byte at the 64KB mark must fall inside a record for the carry path to run
+        expect(text.charCodeAt(64 * 1024 - 1)).not.toBe(0x0a);
+
+        const { rows } = expectMatchesReference(text);
+        expect(rows).toHaveLength(lines.length - 1);
+    });
+
+    test('parses a line longer than the read buffer', () => {
+        const padding = ','.repeat(70 * 1024);
+        const { rows } = expectMatchesReference([
+            'Date,Open,High,Low,Close,Volume',
+            `20200102,1,2,0.5,1.5,100${padding}`,
+            '20200103,1,2,0.5,1.75,200'
+        ].join('\n'));
+
+        expect(rows.map(row => row[5])).toEqual([1.5, 1.75]);
+    });
+});
@@ -0,0 +1,16 @@
+const { parentPort } = require('worker_threads');
+const { parsePriceBuffer, parsePriceFile } = require('./priceParser');
+
+// Worker thread entry point - parses one price file per message and posts the rows back
+// already serialized as JSON, so the main thread passes them to SQLite without touching each row.
+// A message carries either a filePath to read or a buffer with the file's contents.
+parentPort.on('message', ({ id, filePath, buffer, symbol }) => {
+    try {
+        const { rows, error } = buffer
+            ? parsePriceBuffer(Buffer.from(buffer.buffer, buffer.byteOffset, buffer.byteLength), symbol)
+            : parsePriceFile(filePath, symbol);
+        parentPort.postMessage({ id, rowCount: rows.length, rowsJSON: JSON.stringify(rows), error });
+    } catch (error) {
+        parentPort.postMessage({ id, rowCount: 0, rowsJSON: '[]', error: error.message });
+    }
+});
@@ -0,0 +1,310 @@
+const fs = require('fs');
+
+// Price file parsing - pure functions with no database access so they can run
+// on worker threads as well as the main thread
+
+const NEWLINE = 0x0a;
+const COMMA = 0x2c;
+const SLASH = 0x2f;
+const LETTER_N = 0x4e;
+const LETTER_A = 0x41;
+const DIGIT_ZERO = 0x30;
+const DIGIT_NINE = 0x39;
+const PLUS = 0x2b;
+const MINUS = 0x2d;
+const DOT = 0x2e;
+
+// Largest digit count whose integer value is still exact in a double
+const MAX_EXACT_DIGITS = 15;
+
+// Exact powers of ten used to scale parsed mantissas
+const POWERS_OF_TEN = Array.from({ length: MAX_EXACT_DIGITS + 1 }, (_, i) => 10 ** i);
+
+// Byte offsets of the current line's fields, reused for every line parsed
+let fieldStarts = new Int32Array(16);
+let fieldEnds = new Int32Array(16);
+
+function isWhitespace(byte) {
+    return byte === 0x20 || (byte >= 0x09 && byte <= 0x0d);
+}
+
+// Record the field boundaries of buffer[start, end) in fieldStarts/fieldEnds.
+// Returns the field count, or -1 when the line contains "N/A".
+function splitFields(buffer, start, end) {
+    let count = 0;
+    let fieldStart = start;
+
+    for (let i = start; i <= end; i++) {
+        const byte = i < end ? buffer[i] : COMMA;
+
+        if (byte === COMMA) {
+            if (count === fieldStarts.length) {
+                const grownStarts = new Int32Array(count * 2);
+                const grownEnds = new Int32Array(count * 2);
+                grownStarts.set(fieldStarts);
+                grownEnds.set(fieldEnds);
+                fieldStarts = grownStarts;
+                fieldEnds = grownEnds;
+            }
+            fieldStarts[count] = fieldStart;
+            fieldEnds[count] = i;
+            count++;
+            fieldStart = i + 1;
+        } else if (byte === SLASH && i > start && i + 1 < end
+            && buffer[i - 1] === LETTER_N && buffer[i + 1] === LETTER_A) {
+            return -1;
+        }
+    }
+
+    return count;
+}
+
+function fieldText(buffer, index) {
+    return buffer.toString('latin1', fieldStarts[index], fieldEnds[index]);
+}
+
+// Accumulate the digits of buffer[start, end) into an integer, or -1 if any byte is not a digit
+function digitsValue(buffer, start, end) {
+    let value = 0;
+    for (let i = start; i < end; i++) {
+        const byte = buffer[i];
+        if (byte < DIGIT_ZERO || byte > DIGIT_NINE) return -1;
+        value = value * 10 + (byte - DIGIT_ZERO);
+    }
+    return value;
+}
+
+// Dates are stored as YYYYMMDD integers. Both YYYYMMDD and YYYY-MM-DD fields are
+// decoded straight from the bytes; any other shape is kept as text.
+function fieldDate(buffer, index) {
+    const start = fieldStarts[index];
+    const end = fieldEnds[index];
+
+    if (end - start === 8) {
+        const value = digitsValue(buffer, start, end);
+        if (value !== -1) return value;
+    } else if (end - start === 10 && buffer[start + 4] === MINUS && buffer[start + 7] === MINUS) {
+        const year = digitsValue(buffer, start, start + 4);
+        const month = digitsValue(buffer, start + 5, start + 7);
+        const day = digitsValue(buffer, start + 8, end);
+        if (year !== -1 && month !== -1 && day !== -1) return year * 10000 + month * 100 + day;
+    }
+
+    return fieldText(buffer, index);
+}
+
+// Parse a plain decimal ([+-]digits[.digits]) straight from the bytes of a field.
+// The mantissa and scale are both exact doubles, so one division gives the same
+// correctly rounded value as parseFloat. Returns undefined for any other shape.
+function parseDecimalField(buffer, start, end, allowFraction) {
+    let i = start;
+    let negative = false;
+    if (i < end && (buffer[i] === MINUS || buffer[i] === PLUS)) {
+        negative = buffer[i] === MINUS;
+        i++;
+    }
+
+    let mantissa = 0;
+    let digits = 0;
+    let scale = 0;
+    let seenDot = false;
+
+    for (; i < end; i++) {
+        const byte = buffer[i];
+        if (byte >= DIGIT_ZERO && byte <= DIGIT_NINE) {
+            mantissa = mantissa * 10 + (byte - DIGIT_ZERO);
+            digits++;
+            if (seenDot) scale++;
+        } else if (byte === DOT && allowFraction && !seenDot) {
+            seenDot = true;
+        } else {
+            return undefined;
+        }
+    }
+
+    if (digits === 0 || digits > MAX_EXACT_DIGITS) {
+        return undefined;
+    }
+
+    const value = scale === 0 ? mantissa : mantissa / POWERS_OF_TEN[scale];
+    return negative ? -value : value;
+}
+
+function fieldFloat(buffer, index) {
+    if (index === -1) return null;
+    const start = fieldStarts[index];
+    const end = fieldEnds[index];
+    const value = parseDecimalField(buffer, start, end, true);
+    return (value === undefined ? parseFloat(buffer.toString('latin1', start, end)) : value) || null;
+}
+
+function fieldInteger(buffer, index) {
+    if (index === -1) return null;
+    const start = fieldStarts[index];
+    const end = fieldEnds[index];
+    const value = parseDecimalField(buffer, start, end, false);
+    return (value === undefined ? parseInt(buffer.toString('latin1', start, end)) : value) || null;
+}
+
+// Column layout and rows of one file being parsed. Lines are fed in blocks, so a
+// file can be parsed from one buffer or streamed through a fixed-size one.
+function createParseState(symbol) {
+    return {
+        symbol,
+        columns: null,
+        minColumns: 0,
+        rows: [],
+        dataLines: 0,
+        error: null
+    };
+}
+
+function parseHeader(state, buffer, start, end) {
+    const headers = buffer.toString('latin1', start, end).split(',');
+
+    // Find column indices
+    const findColumn = (name) => headers.findIndex(h => h.toLowerCase().includes(name));
+    const columns = {
+        date: findColumn('date'),
+        open: findColumn('open'),
+        high: findColumn('high'),
+        low: findColumn('low'),
+        close: findColumn('close'),
+        volume: findColumn('vol')
+    };
+
+    if (columns.date === -1 || columns.close === -1) {
+        state.error = 'Missing required columns (date, close)';
+        return;
+    }
+
+    state.columns = columns;
+    state.minColumns = Math.max(columns.date, columns.open, columns.high, columns.low, columns.close, columns.volume) + 1;
+}
+
+// Parse the lines in buffer[start, end). The block must end on a line boundary.
+function parseLines(state, buffer, start, end) {
+    const { symbol, rows } = state;
+
+    for (let lineStart = start; lineStart < end && state.error === null;) {
+        let lineEnd = buffer.indexOf(NEWLINE, lineStart);
+        if (lineEnd === -1 || lineEnd > end) lineEnd = end;
+        const nextLine = lineEnd + 1;
+
+        // Ignore whitespace around the line, including the CR of CRLF line endings
+        let contentStart = lineStart;
+        while (contentStart < lineEnd && isWhitespace(buffer[contentStart])) contentStart++;
+        while (lineEnd > contentStart && isWhitespace(buffer[lineEnd - 1])) lineEnd--;
+        const fieldsStart = lineStart;
+        lineStart = nextLine;
+
+        // Skip blank lines
+        if (contentStart === lineEnd) continue;
+
+        // The first non-blank line is the header
+        if (state.columns === null) {
+            parseHeader(state, buffer, contentStart, lineEnd);
+            continue;
+        }
+
+        // Skip lines with missing values
+        const fieldCount = splitFields(buffer, fieldsStart, lineEnd);
+        if (fieldCount === -1) continue;
+        state.dataLines++;
+
+        if (fieldCount >= state.minColumns) {
+            const columns = state.columns;
+            const date = fieldDate(buffer, columns.date);
+            const close = fieldFloat(buffer, columns.close);
+
+            if (date && close && !isNaN(close)) {
+                rows.push([
+                    symbol,
+                    date,
+                    fieldFloat(buffer, columns.open),
+                    fieldFloat(buffer, columns.high),
+                    fieldFloat(buffer, columns.low),
+                    close,
+                    fieldInteger(buffer, columns.volume)
+                ]);
+            }
+        }
+    }
+}
+
+function finishParse(state) {
+    if (state.error === null && state.columns === null) {
+        state.error = 'Missing required columns (date, close)';
+    }
+    if (state.error === null && state.dataLines === 0) {
+        state.error = 'No valid data rows found';
+    }
+
+    if (state.error !== null) {
+        return { rows: [], error: state.error };
+    }
+    return { rows: state.rows, error: null };
+}
+
+// Parse CSV/TXT price bytes into [symbol, date, open, high, low, close, volume] rows,
+// with date as a YYYYMMDD integer
+function parsePriceBuffer(buffer, symbol) {
+    const state = createParseState(symbol);
+    parseLines(state, buffer, 0, buffer.length);
+    return finishParse(state);
+}
+
+// Files are streamed through one read buffer that is reused for every file parsed.
+// It only grows past the chunk size for a single line longer than the buffer.
+const READ_CHUNK_SIZE = 64 * 1024;
+let readBuffer = Buffer.allocUnsafe(READ_CHUNK_SIZE);
+
+// Read and parse a price file from disk a chunk at a time. Complete lines are parsed
+// as soon as they are read and a trailing partial line is carried into the next read.
+// Parsed rows hold numbers and latin1 copies of text fields, so nothing refers back
+// to the shared read buffer.
+function parsePriceFile(filePath, symbol) {
+    const state = createParseState(symbol);
+    const fd = fs.openSync(filePath, 'r');
+
+    try {
+        let carried = 0;
+        for (;;) {
+            if (carried === readBuffer.length) {
+                const grown = Buffer.allocUnsafe(readBuffer.length * 2);
+                readBuffer.copy(grown, 0, 0, carried);
+                readBuffer = grown;
+            }
+
+            const bytesRead = fs.readSync(fd, readBuffer, carried, readBuffer.length - carried, null);
+            if (bytesRead === 0) break;
+
+            const dataEnd = carried + bytesRead;
+            const lastNewline = readBuffer.lastIndexOf(NEWLINE, dataEnd - 1);
+            if (lastNewline === -1) {
+                carried = dataEnd;
+                continue;
+            }
+
+            parseLines(state, readBuffer, 0, lastNewline + 1);
+            if (state.error !== null) break;
+
+            readBuffer.copyWithin(0, lastNewline + 1, dataEnd);
+            carried = dataEnd - lastNewline - 1;
+        }
+
+        // The final line has no newline after it
+        if (state.error === null) {
+            parseLines(state, readBuffer, 0, carried);
+        }
+    } finally {
+        fs.closeSync(fd);
+    }
+
+    return finishParse(state);
+}
+
+module.exports = {
+    parsePriceBuffer,
+    parsePriceFile
+};
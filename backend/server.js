@@ -6,23 +6,478 @@ const sqlite3 = require('sqlite3').verbose();
 const path = require('path');
 const multer = require('multer');
 const fs = require('fs');
+const os = require('os');
+const { Worker } = require('worker_threads');
 const AdmZip = require('adm-zip');
 
 const app = express();
 const PORT = process.env.PORT || 3000;
 
+// File name suffix of US listings, stripped from symbols in either case
+const US_SUFFIX_UPPER = '.US';
+const US_SUFFIX_LOWER = '.us';
+
 // CSV Processing Function - Simplified version to avoid database locks
 // Helper function to clean symbol name
 function cleanSymbolName(symbol) {
     // Remove .US suffix if present
-    return symbol.replace(/\.US$/i, '');
+    return symbol.endsWith(US_SUFFIX_UPPER) || symbol.endsWith(US_SUFFIX_LOWER)
+        ? symbol.slice(0, -US_SUFFIX_UPPER.length)
+        : symbol;
+}
+
+// SQL for the statements run per file or per symbol by the import and fetch paths,
+// defined once so every caller runs the same statement text
+const INSERT_SYMBOL_SQL = `
+    INSERT OR IGNORE INTO symbols (symbol, name, sector, market_cap, exchange, is_active)
+    VALUES (?, ?, ?, ?, ?, ?)
+`;
+
+const REPLACE_PRICE_ROW_SQL = `
+    INSERT OR REPLACE INTO historical_prices (symbol, date, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+`;
+
+const MARK_SYMBOL_FRESH_SQL = `
+    INSERT OR REPLACE INTO data_freshness (symbol, last_updated, status, error_count)
+    VALUES (?, CURRENT_TIMESTAMP, 'active', 0)
+`;
+
+const COUNT_SYMBOL_PRICES_SQL = 'SELECT COUNT(*) as count FROM historical_prices WHERE symbol = ?';
+
+const COUNT_PRICE_ON_DATE_SQL = `
+    SELECT COUNT(*) as record_count FROM historical_prices 
+    WHERE symbol = ? AND date = ?
+`;
+
+const MARK_SYMBOL_ERROR_SQL = `
+    INSERT OR REPLACE INTO data_freshness (symbol, last_updated, status, error_count)
+    VALUES (?, CURRENT_TIMESTAMP, 'error', COALESCE((SELECT error_count FROM data_freshness WHERE symbol = ?), 0) + 1)
+`;
+
+// Set-based variants used by bulk imports; each takes one JSON array parameter
+const INSERT_SYMBOLS_JSON_SQL = `
+    INSERT INTO symbols (symbol, name, sector, market_cap, exchange, is_active)
+    SELECT value, value, 'Unknown', 'Unknown', 'NASDAQ', 1
+    FROM json_each(?)
+    WHERE true
+    ON CONFLICT(symbol) DO NOTHING
+`;
+
+// Inserts many price rows with a single statement. The JSON array holds
+// [symbol, date, open, high, low, close, volume] rows, which SQLite unpacks natively
+// so the driver round trip is paid once per batch.
+const INSERT_PRICE_ROWS_JSON_SQL = `
+    INSERT OR IGNORE INTO historical_prices (symbol, date, open, high, low, close, volume)
+    SELECT value ->> 0, value ->> 1, value ->> 2, value ->> 3, value ->> 4, value ->> 5, value ->> 6
+    FROM json_each(?)
+`;
+
+// Folder imports write batches that mix many files, so each batch is sorted by (symbol, date)
+// before it reaches the UNIQUE(symbol, date) index. The sort covers one batch at a time.
+const INSERT_SORTED_PRICE_ROWS_JSON_SQL = `
+    INSERT OR IGNORE INTO historical_prices (symbol, date, open, high, low, close, volume)
+    SELECT value ->> 0, value ->> 1, value ->> 2, value ->> 3, value ->> 4, value ->> 5, value ->> 6
+    FROM json_each(?)
+    ORDER BY value ->> 0, value ->> 1
+`;
+
+// Plain-INSERT variants for callers that report duplicate rows rather than skipping them
+const INSERT_PRICE_ROWS_STRICT_JSON_SQL = `
+    INSERT INTO historical_prices (symbol, date, open, high, low, close, volume)
+    SELECT value ->> 0, value ->> 1, value ->> 2, value ->> 3, value ->> 4, value ->> 5, value ->> 6
+    FROM json_each(?)
+`;
+
+const INSERT_PRICE_ROW_SQL = `
+    INSERT INTO historical_prices (symbol, date, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+`;
+
+const MARK_SYMBOLS_FRESH_JSON_SQL = `
+    INSERT OR REPLACE INTO data_freshness (symbol, last_updated, status, error_count)
+    SELECT value, CURRENT_TIMESTAMP, 'active', 0
+    FROM json_each(?)
+`;
+
+// Helper function to run a statement that returns no rows as a promise
+function runSQL(sql, params = []) {
+    return new Promise((resolve, reject) => {
+        db.run(sql, params, function(err) {
+            if (err) reject(err);
+            else resolve(this.changes);
+        });
+    });
+}
+
+// Prepared statements for the SQL above, created on first use and kept for the life of
+// the connection. node-sqlite3 queues calls on a statement, so concurrent callers can share one.
+const statementCache = new Map();
+
+function cachedStatement(sql) {
+    let statement = statementCache.get(sql);
+    if (!statement) {
+        statement = db.prepare(sql);
+        statementCache.set(sql, statement);
+    }
+    return statement;
+}
+
+// Fetch the first row of a cached query. The statement is reset afterwards so it does not
+// stay mid-query and hold its read open, which would block COMMIT on this connection.
+function getCached(sql, params, callback) {
+    const statement = cachedStatement(sql);
+    statement.get(params, callback);
+    statement.reset();
 }
 
-async function processCSVFile(filePath, convertToUppercase = true, preventDuplicates = true, originalFilename = null) {
+// Helper function to prepare a statement once so it can be run many times
+function prepareSQL(sql) {
+    return new Promise((resolve, reject) => {
+        const statement = db.prepare(sql, (err) => {
+            if (err) reject(err);
+            else resolve(statement);
+        });
+    });
+}
+
+// Helper function to run a prepared statement as a promise
+function runStatement(statement, params = []) {
+    return new Promise((resolve, reject) => {
+        statement.run(params, function(err) {
+            if (err) reject(err);
+            else resolve(this.changes);
+        });
+    });
+}
+
+function finalizeStatement(statement) {
+    return new Promise((resolve) => statement.finalize(() => resolve()));
+}
+
+// Connection settings used while a bulk import runs, and the defaults restored afterwards.
+// Durability is relaxed only for the import; the defaults match the startup PRAGMAs.
+const BULK_LOAD_PRAGMAS = [
+    'PRAGMA synchronous = OFF',
+    'PRAGMA cache_size = -262144' // 256MB page cache
+];
+const DEFAULT_LOAD_PRAGMAS = [
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -65536'
+];
+
+// Tables whose secondary indexes are dropped during a bulk import and rebuilt afterwards
+const BULK_LOAD_INDEXED_TABLES = ['historical_prices', 'symbols'];
+
+// Helper function to switch the connection into bulk import mode.
+// Secondary indexes are dropped so each insert only maintains the table and its
+// UNIQUE constraints; the returned definitions are rebuilt by endBulkLoad.
+async function beginBulkLoad() {
+    for (const pragma of BULK_LOAD_PRAGMAS) {
+        await runSQL(pragma);
+    }
+
+    const placeholders = BULK_LOAD_INDEXED_TABLES.map(() => '?').join(', ');
+    const indexes = await new Promise((resolve, reject) => {
+        db.all(`
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN (${placeholders})
+        `, BULK_LOAD_INDEXED_TABLES, (err, rows) => {
+            if (err) reject(err);
+            else resolve(rows);
+        });
+    });
+
+    for (const index of indexes) {
+        await runSQL(`DROP INDEX IF EXISTS ${index.name}`);
+    }
+
+    return indexes;
+}
+
+// Helper function to rebuild dropped indexes and restore normal connection settings
+async function endBulkLoad(droppedIndexes = []) {
+    for (const index of droppedIndexes) {
+        await runSQL(index.sql);
+    }
+
+    for (const pragma of DEFAULT_LOAD_PRAGMAS) {
+        await runSQL(pragma);
+    }
+}
+
+// Set while a folder import, file upload or structured upload runs. Each can hold a
+// transaction open on the one shared connection across awaits, so a second import could not
+// start its own, or would write into the first one's; it is refused instead.
+let importInProgress = false;
+
+function rejectConcurrentImport(res) {
+    return res.status(409).json({
+        status: 'error',
+        message: 'Another import is already running. Try again once it finishes.'
+    });
+}
+
+// Bulk-load mode rebuilds every secondary index over the whole table when it ends, so it
+// only pays off when an import is large next to what is already stored
+const BULK_LOAD_MIN_FILES = 100;
+const BULK_LOAD_MIN_TABLE_SHARE = 0.25;
+
+// Helper function to decide whether an import of fileCount price files should use bulk-load
+// mode. Its row count is estimated from the average number of rows stored per symbol.
+async function shouldUseBulkLoad(fileCount) {
+    if (fileCount < BULK_LOAD_MIN_FILES) {
+        return false;
+    }
+
+    const counts = await new Promise((resolve, reject) => {
+        db.get(`
+            SELECT
+                (SELECT COUNT(*) FROM historical_prices) AS priceRows,
+                (SELECT COUNT(*) FROM symbols) AS symbolCount
+        `, (err, row) => {
+            if (err) reject(err);
+            else resolve(row);
+        });
+    });
+
+    if (counts.priceRows === 0 || counts.symbolCount === 0) {
+        return true;
+    }
+
+    const estimatedRows = fileCount * (counts.priceRows / counts.symbolCount);
+    return estimatedRows >= counts.priceRows * BULK_LOAD_MIN_TABLE_SHARE;
+}
+
+// Helper function to delete the files multer stored for an upload request, by the path
+// multer wrote each one to
+function removeUploadedFiles(req) {
+    const allFiles = [];
+    if (req.files && req.files.files) allFiles.push(...req.files.files);
+    if (req.files && req.files.compressedFiles) allFiles.push(...req.files.compressedFiles);
+
+    for (const file of allFiles) {
+        try {
+            // A file that is already gone needs no existence check first
+            fs.unlinkSync(file.path);
+        } catch (error) {
+            if (error.code === 'ENOENT') continue;
+            console.warn(`Could not delete uploaded file ${file.originalname}:`, error.message);
+        }
+    }
+}
+
+// Helper function to list the CSV/TXT price files under a folder, as paths relative to it.
+// Subfolders are walked with an explicit stack of pending directories rather than recursion.
+function listPriceFiles(folderPath, includeSubfolders = false) {
+    const files = [];
+    const pendingDirs = [''];
+
+    while (pendingDirs.length > 0) {
+        const relativeDir = pendingDirs.pop();
+        // Entries carry their type, so no extra stat per file
+        const entries = fs.readdirSync(path.join(folderPath, relativeDir), { withFileTypes: true });
+
+        for (const entry of entries) {
+            const relativePath = relativeDir ? path.join(relativeDir, entry.name) : entry.name;
+            if (entry.isDirectory()) {
+                if (includeSubfolders) pendingDirs.push(relativePath);
+                continue;
+            }
+
+            const name = entry.name.toLowerCase();
+            if (name.endsWith('.csv') || name.endsWith('.txt')) {
+                files.push(relativePath);
+            }
+        }
+    }
+
+    return files;
+}
+
+// Number of worker threads used to parse price files during folder imports
+const PARSE_WORKER_COUNT = Math.max(1, os.cpus().length);
+
+// Helper function to parse price files on a pool of worker threads.
+// onResult(task, { rowCount, rowsJSON, error }) runs on the main thread one file at a time, so SQLite
+// keeps a single writer; a worker is handed its next file once its result is handled.
+function parsePriceFilesInWorkers(tasks, onResult) {
+    return new Promise((resolve, reject) => {
+        if (tasks.length === 0) {
+            resolve();
+            return;
+        }
+
+        const workers = [];
+        let nextTask = 0;
+        let finishedTasks = 0;
+        let handled = Promise.resolve();
+        let failed = false;
+
+        const shutdown = () => {
+            for (const worker of workers) {
+                worker.terminate();
+            }
+        };
+
+        const fail = (error) => {
+            if (failed) return;
+            failed = true;
+            shutdown();
+            reject(error);
+        };
+
+        const dispatch = (worker) => {
+            if (nextTask < tasks.length) {
+                const { filePath, symbol } = tasks[nextTask];
+                worker.postMessage({ id: nextTask, filePath, symbol });
+                nextTask++;
+            }
+        };
+
+        const workerCount = Math.min(PARSE_WORKER_COUNT, tasks.length);
+        for (let i = 0; i < workerCount; i++) {
+            const worker = new Worker(path.join(__dirname, 'parseWorker.js'));
+
+            worker.on('message', ({ id, ...result }) => {
+                if (failed) return;
+                handled = handled
+                    .then(() => onResult(tasks[id], result))
+                    .then(() => {
+                        finishedTasks++;
+                        if (finishedTasks === tasks.length) {
+                            shutdown();
+                            resolve();
+                        } else {
+                            dispatch(worker);
+                        }
+                    })
+                    .catch(fail);
+            });
+            worker.on('error', fail);
+
+            workers.push(worker);
+            dispatch(worker);
+        }
+    });
+}
+
+// Long-lived parse workers for uploads, where files arrive a few at a time rather than as
+// one known list. Requests queue until a worker is free; up to PARSE_WORKER_COUNT workers
+// are started on demand and kept idle between uploads.
+const idleParseWorkers = [];
+const queuedParseRequests = [];
+const activeParseRequests = new Map();
+let sharedParseWorkerCount = 0;
+
+function createSharedParseWorker() {
+    const worker = new Worker(path.join(__dirname, 'parseWorker.js'));
+    sharedParseWorkerCount++;
+
+    worker.on('message', ({ id, ...result }) => {
+        const request = activeParseRequests.get(worker);
+        activeParseRequests.delete(worker);
+        worker.unref();
+        idleParseWorkers.push(worker);
+        request.resolve(result);
+        dispatchSharedParseRequests();
+    });
+
+    worker.on('error', (error) => {
+        const request = activeParseRequests.get(worker);
+        activeParseRequests.delete(worker);
+        const idleIndex = idleParseWorkers.indexOf(worker);
+        if (idleIndex !== -1) idleParseWorkers.splice(idleIndex, 1);
+        sharedParseWorkerCount--;
+        if (request) request.reject(error);
+        dispatchSharedParseRequests();
+    });
+
+    return worker;
+}
+
+function dispatchSharedParseRequests() {
+    while (queuedParseRequests.length > 0) {
+        let worker = idleParseWorkers.pop();
+        if (!worker) {
+            if (sharedParseWorkerCount >= PARSE_WORKER_COUNT) return;
+            worker = createSharedParseWorker();
+        }
+
+        // Only a worker with a request in flight keeps the process alive
+        const request = queuedParseRequests.shift();
+        activeParseRequests.set(worker, request);
+        worker.ref();
+        worker.postMessage({ id: 0, ...request.message });
+    }
+}
+
+// Helper function to parse one price file on a shared worker. Pass { filePath, symbol } for a
+// file on disk or { buffer, symbol } for contents already in memory. Resolves with
+// { rowCount, rowsJSON, error }, the same result the folder import's workers produce.
+function parsePriceFileInSharedWorker(message) {
+    return new Promise((resolve, reject) => {
+        queuedParseRequests.push({ message, resolve, reject });
+        dispatchSharedParseRequests();
+    });
+}
+
+// Helper function to register many symbols with a single statement.
+// Symbols are sent in sorted order so the unique index is walked sequentially.
+function insertSymbols(symbols) {
+    return runSQL(INSERT_SYMBOLS_JSON_SQL, [JSON.stringify([...symbols].sort())]);
+}
+
+// Helper function to mark many symbols as freshly updated with a single statement
+function markSymbolsFresh(symbols) {
+    return runSQL(MARK_SYMBOLS_FRESH_JSON_SQL, [JSON.stringify(symbols)]);
+}
+
+// Helper function to insert price rows with one batched statement. A constraint failure
+// undoes the whole statement, so the batch is then retried a row at a time and only the
+// offending rows are left out. Resolves { inserted, failures } with one failure per skipped row.
+// The retry runs inside a savepoint so it commits once, not once per row, when the caller
+// has no transaction open.
+async function insertPriceRowsWithFallback(rows) {
+    try {
+        return { inserted: await runSQL(INSERT_PRICE_ROWS_STRICT_JSON_SQL, [JSON.stringify(rows)]), failures: [] };
+    } catch (err) {
+        if (err.code !== 'SQLITE_CONSTRAINT') throw err;
+    }
+
+    let inserted = 0;
+    const failures = [];
+    const statement = cachedStatement(INSERT_PRICE_ROW_SQL);
+    await runSQL('SAVEPOINT price_row_fallback');
+    try {
+        for (const row of rows) {
+            try {
+                inserted += await runStatement(statement, row);
+            } catch (err) {
+                if (err.code !== 'SQLITE_CONSTRAINT') throw err;
+                failures.push({ row, error: err.message });
+            }
+        }
+    } catch (err) {
+        await runSQL('ROLLBACK TO price_row_fallback');
+        await runSQL('RELEASE price_row_fallback');
+        throw err;
+    }
+    await runSQL('RELEASE price_row_fallback');
+    return { inserted, failures };
+}
+
+// Number of price rows sent to SQLite per batched insert during bulk imports
+const PRICE_INSERT_BATCH_SIZE = 10000;
+
+// Number of uploaded files written between commits, so a long upload still checkpoints its progress
+const UPLOAD_COMMIT_INTERVAL = 500;
+
+// fileBuffer, when given, holds the file's contents already in memory (e.g. a zip entry)
+// and filePath is not read
+async function processCSVFile(filePath, convertToUppercase = true, preventDuplicates = true, originalFilename = null, fileBuffer = null) {
     return new Promise((resolve, reject) => {
         try {
-            const fileContent = fs.readFileSync(filePath, 'utf8');
-            
             // Extract symbol from original filename if provided, otherwise from filePath
             let symbol = originalFilename ? 
                 path.basename(originalFilename, path.extname(originalFilename)) :
@@ -36,45 +491,30 @@ async function processCSVFile(filePath, convertToUppercase = true, preventDuplic
                 symbol = symbol.toUpperCase();
             }
             
-            // Insert symbol into symbols table first (if not duplicate)
-            db.run(`
-                INSERT OR IGNORE INTO symbols (symbol, name, sector, market_cap, exchange, is_active)
-                VALUES (?, ?, ?, ?, ?, ?)
-            `, [symbol, symbol, 'Unknown', 'Unknown', 'NASDAQ', 1], (err) => {
+            // Parsed on a shared worker thread; only called once the symbol is not a duplicate
+            const parseFile = () => parsePriceFileInSharedWorker(fileBuffer ? { buffer: fileBuffer, symbol } : { filePath, symbol });
+            
+            // The symbol row itself is registered once per upload by the caller, together
+            // with every other symbol in the request
+            if (!preventDuplicates) {
+                processFileContentSimple(parseFile, symbol, resolve, reject);
+                return;
+            }
+            
+            // Skip symbols that already have historical data
+            getCached(COUNT_SYMBOL_PRICES_SQL, [symbol], (err, result) => {
                 if (err) {
                     reject(err);
                     return;
                 }
                 
-                // Check if symbol was actually inserted (for duplicate detection)
-                db.get('SELECT symbol FROM symbols WHERE symbol = ?', [symbol], (err, row) => {
-                    if (err) {
-                        reject(err);
-                        return;
-                    }
-                    
-                    if (row && preventDuplicates) {
-                        // Check if this is a new insertion by checking if we have historical data
-                        db.get('SELECT COUNT(*) as count FROM historical_prices WHERE symbol = ?', [symbol], (err, result) => {
-                            if (err) {
-                                reject(err);
-                                return;
-                            }
-                            
-                            if (result.count > 0) {
-                                console.log(`Skipping duplicate symbol: ${symbol} (already has data)`);
-                                resolve({ symbolsAdded: 0, recordsAdded: 0 });
-                                return;
-                            }
-                            
-                            // Symbol exists but no data, so process it
-                            processFileContentSimple(fileContent, symbol, resolve, reject);
-                        });
-                    } else {
-                        // Continue processing
-                        processFileContentSimple(fileContent, symbol, resolve, reject);
-                    }
-                });
+                if (result.count > 0) {
+                    console.log(`Skipping duplicate symbol: ${symbol} (already has data)`);
+                    resolve({ symbolsAdded: 0, recordsAdded: 0 });
+                    return;
+                }
+                
+                processFileContentSimple(parseFile, symbol, resolve, reject);
             });
         } catch (error) {
             reject(error);
@@ -82,125 +522,43 @@ async function processCSVFile(filePath, convertToUppercase = true, preventDuplic
     });
 }
 
-function processFileContentSimple(fileContent, symbol, resolve, reject) {
-    try {
-        // Parse CSV content
-        const lines = fileContent.trim().split('\n');
-        const headers = lines[0].split(',');
-        
-        // Find column indices
-        const dateIndex = headers.findIndex(h => h.toLowerCase().includes('date'));
-        const openIndex = headers.findIndex(h => h.toLowerCase().includes('open'));
-        const highIndex = headers.findIndex(h => h.toLowerCase().includes('high'));
-        const lowIndex = headers.findIndex(h => h.toLowerCase().includes('low'));
-        const closeIndex = headers.findIndex(h => h.toLowerCase().includes('close'));
-        const volumeIndex = headers.findIndex(h => h.toLowerCase().includes('vol'));
-        
-        if (dateIndex === -1 || closeIndex === -1) {
-            reject(new Error('Missing required columns (date, close)'));
+function processFileContentSimple(parseFile, symbol, resolve, reject) {
+    // Parse CSV content with the same byte parser the folder import uses
+    parseFile().then(({ rowCount, rowsJSON, error }) => {
+        if (error) {
+            reject(new Error(error));
             return;
         }
         
-        // Process data rows
-        const dataRows = lines.slice(1).filter(line => line.trim() && !line.includes('N/A'));
-        
-        if (dataRows.length === 0) {
-            reject(new Error('No valid data rows found'));
+        if (rowCount === 0) {
+            resolve({ symbol, symbolsAdded: 1, recordsAdded: 0 });
             return;
         }
         
-        // Prepare all valid data rows for batch insert
-        const validRows = [];
-        for (const line of dataRows) {
-            const values = line.split(',');
-            
-            if (values.length >= Math.max(dateIndex, openIndex, highIndex, lowIndex, closeIndex, volumeIndex) + 1) {
-                const date = values[dateIndex];
-                const open = parseFloat(values[openIndex]) || null;
-                const high = parseFloat(values[highIndex]) || null;
-                const low = parseFloat(values[lowIndex]) || null;
-                const close = parseFloat(values[closeIndex]) || null;
-                const volume = parseInt(values[volumeIndex]) || null;
-                
-                if (date && close && !isNaN(close)) {
-                    validRows.push([symbol, date, open, high, low, close, volume]);
-                }
-            }
-        }
-        
-        if (validRows.length === 0) {
-            // No valid data, just update freshness and resolve
-            db.run(`
-                INSERT OR REPLACE INTO data_freshness (symbol, last_updated, status, error_count)
-                VALUES (?, CURRENT_TIMESTAMP, 'active', 0)
-            `, [symbol], (err) => {
-                if (err) {
-                    reject(err);
-                } else {
-                    resolve({ symbolsAdded: 1, recordsAdded: 0 });
-                }
-            });
-            return;
-        }
-        
-        // Use prepared statement for better performance
-        const insertStmt = db.prepare(`
-            INSERT OR IGNORE INTO historical_prices (symbol, date, open, high, low, close, volume)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        `);
-        
-        let recordsInserted = 0;
-        
-        // Insert all rows in batch
-        for (const row of validRows) {
-            insertStmt.run(row, (err) => {
-                if (err) {
-                    insertStmt.finalize();
-                    reject(err);
-                    return;
-                }
-                recordsInserted++;
-            });
-        }
-        
-        // Finalize statement and update freshness
-        insertStmt.finalize((err) => {
+        // Insert all rows with one batched statement - the worker already serialized them
+        cachedStatement(INSERT_PRICE_ROWS_JSON_SQL).run([rowsJSON], (err) => {
             if (err) {
                 reject(err);
-                return;
+            } else {
+                resolve({ symbol, symbolsAdded: 1, recordsAdded: rowCount });
             }
-            
-            // Update data freshness
-            db.run(`
-                INSERT OR REPLACE INTO data_freshness (symbol, last_updated, status, error_count)
-                VALUES (?, CURRENT_TIMESTAMP, 'active', 0)
-            `, [symbol], (err) => {
-                if (err) {
-                    reject(err);
-                } else {
-                    resolve({ symbolsAdded: 1, recordsAdded: recordsInserted });
-                }
-            });
         });
-        
-    } catch (error) {
-        reject(error);
-    }
+    }).catch(reject);
 }
 
 // File upload configuration
+// The upload folder is created once here rather than checked on every uploaded file
+const UPLOAD_DIR = path.join(__dirname, 'uploads');
+fs.mkdirSync(UPLOAD_DIR, { recursive: true });
+
 const storage = multer.diskStorage({
   destination: function (req, file, cb) {
-    const uploadDir = path.join(__dirname, 'uploads');
-    if (!fs.existsSync(uploadDir)) {
-      fs.mkdirSync(uploadDir, { recursive: true });
-    }
-    cb(null, uploadDir);
+    cb(null, UPLOAD_DIR);
   },
   filename: function (req, file, cb) {
-    // Preserve original filename and path structure
-    const relativePath = file.originalname;
-    cb(null, relativePath);
+    // Stored under a unique name so files of concurrent requests never overwrite or delete
+    // each other; the original name is still used to derive the symbol
+    cb(null, `${Date.now()}-${Math.round(Math.random() * 1e9)}-${path.basename(file.originalname)}`);
   }
 });
 
@@ -241,9 +599,9 @@ const db = new sqlite3.Database(dbPath, (err) => {
     db.serialize(() => {
       db.run('PRAGMA journal_mode = WAL'); // Write-Ahead Logging for better concurrency
       db.run('PRAGMA synchronous = NORMAL'); // Faster writes with reasonable safety
-      db.run('PRAGMA cache_size = 10000'); // Larger cache for better performance
+      db.run('PRAGMA cache_size = -65536'); // 64MB page cache
       db.run('PRAGMA temp_store = MEMORY'); // Use memory for temp tables
-      db.run('PRAGMA mmap_size = 268435456'); // 256MB memory mapping
+      db.run('PRAGMA mmap_size = 1073741824'); // 1GB memory mapping
       db.run('PRAGMA auto_vacuum = INCREMENTAL'); // Incremental vacuum for better performance
       db.run('PRAGMA incremental_vacuum = 1000'); // Vacuum 1000 pages at a time
       console.log('Database optimized for concurrent operations');
@@ -299,7 +657,7 @@ const db = new sqlite3.Database(dbPath, (err) => {
         CREATE TABLE IF NOT EXISTS historical_prices (
           id INTEGER PRIMARY KEY AUTOINCREMENT,
           symbol TEXT NOT NULL,
-          date DATE NOT NULL,
+          date INTEGER NOT NULL,
           open REAL,
           high REAL,
           low REAL,
@@ -311,11 +669,12 @@ const db = new sqlite3.Database(dbPath, (err) => {
         )
       `;
       
+      // Symbol lookups and (symbol, date) ranges are served by UNIQUE(symbol, date) and the
+      // covering index, so the single-column and two-column prefixes of it are dropped
       const createHistoricalIndexes = `
-        CREATE INDEX IF NOT EXISTS idx_historical_prices_symbol ON historical_prices(symbol);
-        CREATE INDEX IF NOT EXISTS idx_historical_prices_date ON historical_prices(date);
-        CREATE INDEX IF NOT EXISTS idx_historical_prices_symbol_date ON historical_prices(symbol, date);
-        CREATE INDEX IF NOT EXISTS idx_historical_prices_close ON historical_prices(close);
+        CREATE INDEX IF NOT EXISTS idx_historical_prices_symbol_date_close ON historical_prices(symbol, date, close);
+        DROP INDEX IF EXISTS idx_historical_prices_symbol_date;
+        DROP INDEX IF EXISTS idx_historical_prices_symbol;
       `;
       
       db.run(createHistoricalPricesTable, (err) => {
@@ -324,8 +683,8 @@ const db = new sqlite3.Database(dbPath, (err) => {
         } else {
           console.log('Historical prices table ready');
           
-          // Create indexes
-          db.run(createHistoricalIndexes, (err) => {
+          // Create indexes - exec runs every statement in the block, run would stop after the first
+          db.exec(createHistoricalIndexes, (err) => {
             if (err) {
               console.error('Error creating historical indexes:', err.message);
             } else {
@@ -657,17 +1016,8 @@ async function fetchLocalData(symbol) {
             
             console.log(`✅ Found ${rows.length} data points for ${symbol} in local database`);
             
-            // Convert to the expected format
-            const data = rows.map(row => ({
-                date: row.date,
-                open: parseFloat(row.open),
-                high: parseFloat(row.high),
-                low: parseFloat(row.low),
-                close: parseFloat(row.close),
-                volume: parseInt(row.volume)
-            }));
-            
-            resolve(data);
+            // Rows already have the expected shape - REAL and INTEGER columns come back as numbers
+            resolve(rows);
         });
     });
 }
@@ -863,10 +1213,11 @@ function executeCyclesQuery(threshold, baseETF, leveragedETF, baseTable, leverag
     const query = `
         SELECT date, close
         FROM ${baseTable}
+        WHERE symbol = ?
         ORDER BY date
     `;
 
-    db.all(query, [], (err, rows) => {
+    db.all(query, [baseETF], (err, rows) => {
         if (err) {
             console.error('Database error:', err);
             return res.status(500).json({ error: 'Database error' });
@@ -899,14 +1250,19 @@ function detectCyclesFromScratch(priceData, threshold, etf) {
     const cycles = [];
     let cycleNumber = 1;
     
+    // Closing prices in a flat typed array so the scans below read contiguous numbers
+    const closes = new Float64Array(priceData.length);
+    for (let i = 0; i < priceData.length; i++) {
+        closes[i] = priceData[i].close;
+    }
+    
     // Step 1: Find all-time highs (true peaks, not local bounces)
     const athPoints = [];
-    let runningMax = priceData[0].close;
+    let runningMax = closes[0];
     let runningMaxDate = priceData[0].date;
     
-    for (let i = 1; i < priceData.length; i++) {
-        const currentPrice = priceData[i].close;
-        const currentDate = priceData[i].date;
+    for (let i = 1; i < closes.length; i++) {
+        const currentPrice = closes[i];
         
         if (currentPrice > runningMax) {
             // New all-time high found
@@ -916,7 +1272,7 @@ function detectCyclesFromScratch(priceData, threshold, etf) {
                 index: i - 1
             });
             runningMax = currentPrice;
-            runningMaxDate = currentDate;
+            runningMaxDate = priceData[i].date;
         }
     }
     
@@ -929,7 +1285,7 @@ function detectCyclesFromScratch(priceData, threshold, etf) {
         });
     }
     
-    console.log(`🏔️ Found ${athPoints.length} all-time highs:`, athPoints.map(p => `${p.date}: $${p.price}`));
+    console.log(`🏔️ Found ${athPoints.length} all-time highs`);
     
     // Step 2: Create cycles from each ATH
     for (let i = 0; i < athPoints.length; i++) {
@@ -939,24 +1295,23 @@ function detectCyclesFromScratch(priceData, threshold, etf) {
         // Find the next ATH or end of data
         const nextAthIndex = i < athPoints.length - 1 ? athPoints[i + 1].index : priceData.length;
         
-        // Get all data between this ATH and the next (or end)
-        const cycleData = priceData.slice(athIndex, nextAthIndex);
-        
-        if (cycleData.length < 2) continue;
+        // The cycle covers the data between this ATH and the next (or end)
+        if (nextAthIndex - athIndex < 2) continue;
         
         // Find the lowest point in this cycle
         let lowestPrice = ath.price;
-        let lowestDate = ath.date;
-        let lowestIndex = 0;
-        
-        for (let j = 0; j < cycleData.length; j++) {
-            if (cycleData[j].close < lowestPrice) {
-                lowestPrice = cycleData[j].close;
-                lowestDate = cycleData[j].date;
-                lowestIndex = j;
+        let actualLowIndex = -1;
+        
+        for (let j = athIndex; j < nextAthIndex; j++) {
+            if (closes[j] < lowestPrice) {
+                lowestPrice = closes[j];
+                actualLowIndex = j;
             }
         }
         
+        const lowestDate = actualLowIndex === -1 ? ath.date : priceData[actualLowIndex].date;
+        if (actualLowIndex === -1) actualLowIndex = athIndex;
+        
         // Calculate drawdown percentage
         const drawdownPct = ((lowestPrice - ath.price) / ath.price) * 100;
         
@@ -966,14 +1321,11 @@ function detectCyclesFromScratch(priceData, threshold, etf) {
             let recoveryDate = null;
             let recoveryPrice = null;
             
-            // Calculate the actual index of the low point in the full dataset
-            const actualLowIndex = athIndex + lowestIndex;
-            
             // Search from the low point forward through ALL remaining data
-            for (let j = actualLowIndex + 1; j < priceData.length; j++) {
-                if (priceData[j].close >= ath.price) {
+            for (let j = actualLowIndex + 1; j < closes.length; j++) {
+                if (closes[j] >= ath.price) {
                     recoveryDate = priceData[j].date;
-                    recoveryPrice = priceData[j].close;
+                    recoveryPrice = closes[j];
                     break;
                 }
             }
@@ -987,8 +1339,8 @@ function detectCyclesFromScratch(priceData, threshold, etf) {
             }
             
             // Calculate durations
-            const athToLowDays = Math.ceil((new Date(lowestDate) - new Date(ath.date)) / (1000 * 60 * 60 * 24));
-            const lowToRecoveryDays = recoveryDate ? Math.ceil((new Date(recoveryDate) - new Date(lowestDate)) / (1000 * 60 * 60 * 24)) : null;
+            const athToLowDays = daysBetweenYYYYMMDD(ath.date, lowestDate);
+            const lowToRecoveryDays = recoveryDate ? daysBetweenYYYYMMDD(lowestDate, recoveryDate) : null;
             
             const basePrefix = etf.toLowerCase();
             const cycle = {
@@ -1024,8 +1376,6 @@ function detectCyclesFromScratch(priceData, threshold, etf) {
             };
             
             cycles.push(cycle);
-            console.log(`✅ Created cycle ${cycle.cycle_number}: ${ath.date} ($${ath.price}) → ${lowestDate} ($${lowestPrice}) [${drawdownPct.toFixed(1)}%] ${recoveryDate ? `→ ${recoveryDate} ($${recoveryPrice})` : '→ Ongoing'}`);
-            console.log(`   Debug: ATH index ${athIndex}, cycle data length ${cycleData.length}, lowest index ${lowestIndex}, next ATH index ${nextAthIndex}`);
         }
     }
     
@@ -1083,16 +1433,9 @@ async function executeSummaryQuery(etf, threshold) {
 
         // Calculate statistics
         const drawdowns = cycles.map(c => Math.abs(c.drawdown_pct));
-        const durations = cycles.map(c => {
-            const lowDate = new Date(c.low_date);
-            const athDate = new Date(c.ath_date);
-            return Math.ceil((lowDate - athDate) / (1000 * 60 * 60 * 24));
-        });
-        const recoveries = cycles.map(c => {
-            const recoveryDate = new Date(c.recovery_date);
-            const lowDate = new Date(c.low_date);
-            return Math.ceil((recoveryDate - lowDate) / (1000 * 60 * 60 * 24));
-        });
+        // Durations were already worked out from the dates when the cycles were detected
+        const durations = cycles.map(c => c.ath_to_low_days);
+        const recoveries = cycles.map(c => c.low_to_recovery_days);
 
             // Calculate severity breakdown
             const severeCycles = cycles.filter(c => c.severity === 'severe').length;
@@ -1145,23 +1488,15 @@ app.get('/api/chart-data/:threshold/:etf?', async (req, res) => {
 // Helper function for single ETF chart data query
 async function executeSingleETFChartDataQuery(etf, threshold) {
     return new Promise((resolve, reject) => {
-        // Get price data from unified historical_prices table
+        // Get price data from unified historical_prices table. Cycles are detected on the
+        // same rows, so they are read once.
         const priceQuery = `
             SELECT date, close
             FROM historical_prices
             WHERE symbol = ?
             ORDER BY date
         `;
-        
-        // Get cycle data - simple query
-        const cycleQuery = `
-            SELECT date, close
-            FROM historical_prices
-            WHERE symbol = ?
-            ORDER BY date
-        `;
 
-        // Execute both queries
         db.all(priceQuery, [etf.toUpperCase()], (err, priceRows) => {
             if (err) {
                 console.error('Database error:', err);
@@ -1169,38 +1504,30 @@ async function executeSingleETFChartDataQuery(etf, threshold) {
                 return;
             }
 
-            db.all(cycleQuery, [etf.toUpperCase()], (err, cycleRows) => {
-                if (err) {
-                    console.error('Database error:', err);
-                    reject(new Error('Database error'));
-                    return;
-                }
-
-                // Process the cycle data to identify complete cycles
-                const cycles = detectCyclesFromScratch(cycleRows, threshold, etf);
-                
-                resolve({
-                    threshold: threshold,
-                    etf: etf,
-                    data: priceRows,
-                    cycles: cycles.map(cycle => ({
-                        ath_date: cycle[`${etf.toLowerCase()}_ath_date`],
-                        ath_price: cycle[`${etf.toLowerCase()}_ath_price`],
-                        low_date: cycle[`${etf.toLowerCase()}_low_date`],
-                        low_price: cycle[`${etf.toLowerCase()}_low_price`],
-                        recovery_date: cycle[`${etf.toLowerCase()}_recovery_date`],
-                        recovery_price: cycle[`${etf.toLowerCase()}_recovery_price`],
-                        drawdown_pct: cycle[`${etf.toLowerCase()}_drawdown_pct`]
-                    })),
-                    metadata: {
-                        dataPoints: priceRows.length,
-                        cycles: cycles.length,
-                        dateRange: {
-                            start: priceRows[0]?.date,
-                            end: priceRows[priceRows.length - 1]?.date
-                        }
+            // Process the price data to identify complete cycles
+            const cycles = detectCyclesFromScratch(priceRows, threshold, etf);
+            
+            resolve({
+                threshold: threshold,
+                etf: etf,
+                data: priceRows,
+                cycles: cycles.map(cycle => ({
+                    ath_date: cycle[`${etf.toLowerCase()}_ath_date`],
+                    ath_price: cycle[`${etf.toLowerCase()}_ath_price`],
+                    low_date: cycle[`${etf.toLowerCase()}_low_date`],
+                    low_price: cycle[`${etf.toLowerCase()}_low_price`],
+                    recovery_date: cycle[`${etf.toLowerCase()}_recovery_date`],
+                    recovery_price: cycle[`${etf.toLowerCase()}_recovery_price`],
+                    drawdown_pct: cycle[`${etf.toLowerCase()}_drawdown_pct`]
+                })),
+                metadata: {
+                    dataPoints: priceRows.length,
+                    cycles: cycles.length,
+                    dateRange: {
+                        start: priceRows[0]?.date,
+                        end: priceRows[priceRows.length - 1]?.date
                     }
-                });
+                }
             });
         });
     });
@@ -1244,6 +1571,7 @@ function executeChartDataQuery(threshold, baseETF, leveragedETF, baseTable, leve
     const baseQuery = `
         SELECT date, close 
         FROM ${baseTable}
+        WHERE symbol = ?
         ORDER BY date
     `;
 
@@ -1251,74 +1579,51 @@ function executeChartDataQuery(threshold, baseETF, leveragedETF, baseTable, leve
     const leveragedQuery = `
         SELECT date, close 
         FROM ${leveragedTable}
+        WHERE symbol = ?
         ORDER BY date
     `;
 
-    db.all(baseQuery, [], (err, baseRows) => {
+    db.all(baseQuery, [baseETF], (err, baseRows) => {
         if (err) {
             console.error(`${baseETF} database error:`, err);
             return res.status(500).json({ error: 'Database error' });
         }
 
-        db.all(leveragedQuery, [], (err, leveragedRows) => {
+        db.all(leveragedQuery, [leveragedETF], (err, leveragedRows) => {
             if (err) {
                 console.error(`${leveragedETF} database error:`, err);
                 return res.status(500).json({ error: 'Database error' });
             }
 
-            // Get cycles for this threshold - simple query
-            const cyclesQuery = `
-                SELECT date, close
-                FROM ${baseTable}
-                ORDER BY date
-            `;
-
-            db.all(cyclesQuery, [], (err, cycleRows) => {
-                if (err) {
-                    console.error('Cycles database error:', err);
-                    return res.status(500).json({ error: 'Database error' });
-                }
+            // Cycles are detected on the base rows already read; the rows are sent as they
+            // came from the query, which already selected only date and close
+            const cycles = detectCyclesFromScratch(baseRows, threshold, baseETF);
 
-                const cycles = detectCyclesFromScratch(cycleRows, threshold, baseETF);
-
-                res.json({
-                    threshold: threshold,
-                    baseETF: baseETF,
-                    leveragedETF: leveragedETF,
-                    [`${baseETF.toLowerCase()}Data`]: baseRows.map(row => ({
-                        date: row.date,
-                        close: row.close
-                    })),
-                    [`${leveragedETF.toLowerCase()}Data`]: leveragedRows.map(row => ({
-                        date: row.date,
-                        close: row.close
-                    })),
-                    // Legacy field names for backward compatibility
-                    qqqData: baseRows.map(row => ({
-                        date: row.date,
-                        close: row.close
-                    })),
-                    tqqqData: leveragedRows.map(row => ({
-                        date: row.date,
-                        close: row.close
-                    })),
-                    cycles: cycles,
-                    metadata: {
-                        [`${baseETF.toLowerCase()}Points`]: baseRows.length,
-                        [`${leveragedETF.toLowerCase()}Points`]: leveragedRows.length,
-                        cycles: cycles.length,
-                        dateRange: {
-                            [baseETF.toLowerCase()]: {
-                                start: baseRows[0]?.date,
-                                end: baseRows[baseRows.length - 1]?.date
-                            },
-                            [leveragedETF.toLowerCase()]: {
-                                start: leveragedRows[0]?.date,
-                                end: leveragedRows[leveragedRows.length - 1]?.date
-                            }
+            res.json({
+                threshold: threshold,
+                baseETF: baseETF,
+                leveragedETF: leveragedETF,
+                [`${baseETF.toLowerCase()}Data`]: baseRows,
+                [`${leveragedETF.toLowerCase()}Data`]: leveragedRows,
+                // Legacy field names for backward compatibility
+                qqqData: baseRows,
+                tqqqData: leveragedRows,
+                cycles: cycles,
+                metadata: {
+                    [`${baseETF.toLowerCase()}Points`]: baseRows.length,
+                    [`${leveragedETF.toLowerCase()}Points`]: leveragedRows.length,
+                    cycles: cycles.length,
+                    dateRange: {
+                        [baseETF.toLowerCase()]: {
+                            start: baseRows[0]?.date,
+                            end: baseRows[baseRows.length - 1]?.date
+                        },
+                        [leveragedETF.toLowerCase()]: {
+                            start: leveragedRows[0]?.date,
+                            end: leveragedRows[leveragedRows.length - 1]?.date
                         }
                     }
-                });
+                }
             });
         });
     });
@@ -1434,8 +1739,31 @@ app.use((err, req, res, next) => {
 
 // These will be moved to the end after all API routes
 
-// Helper function to convert ISO date string to YYYYMMDD format
+const MS_PER_DAY = 1000 * 60 * 60 * 24;
+
+const ISO_DATE_PATTERN = /^(\d{4})-(\d{2})-(\d{2})/;
+
+// Helper function to convert a YYYYMMDD date to a whole day count since the epoch.
+// The layout is known, so the parts are read arithmetically; new Date() would take the
+// integer as milliseconds.
+function yyyymmddToDayNumber(dateInt) {
+    const value = Number(dateInt);
+    return Date.UTC(Math.floor(value / 10000), Math.floor(value / 100) % 100 - 1, value % 100) / MS_PER_DAY;
+}
+
+// Helper function to count the days between two YYYYMMDD dates
+function daysBetweenYYYYMMDD(fromDate, toDate) {
+    return yyyymmddToDayNumber(toDate) - yyyymmddToDayNumber(fromDate);
+}
+
+// Helper function to convert ISO date string to YYYYMMDD format.
+// YYYY-MM-DD prefixes are read directly; anything else goes through the Date parser.
 function convertISODateToYYYYMMDD(isoDate) {
+    const match = ISO_DATE_PATTERN.exec(isoDate);
+    if (match) {
+        return Number(match[1]) * 10000 + Number(match[2]) * 100 + Number(match[3]);
+    }
+
     const date = new Date(isoDate);
     const year = date.getFullYear();
     const month = String(date.getMonth() + 1).padStart(2, '0');
@@ -1443,6 +1771,27 @@ function convertISODateToYYYYMMDD(isoDate) {
     return parseInt(`${year}${month}${day}`);
 }
 
+const YYYYMMDD_PATTERN = /^\d{8}$/;
+
+// Helper function to normalize a client-supplied price date to a YYYYMMDD integer, the form
+// the priceParser paths store. Accepts YYYYMMDD numbers or strings and anything
+// convertISODateToYYYYMMDD reads; returns null when the value is not a date.
+function normalizePriceDate(value) {
+    if (typeof value === 'number') {
+        return Number.isInteger(value) && value >= 10000101 && value <= 99991231 ? value : null;
+    }
+    if (typeof value !== 'string') {
+        return null;
+    }
+
+    const text = value.trim();
+    if (YYYYMMDD_PATTERN.test(text)) {
+        return Number(text);
+    }
+    const dateInt = convertISODateToYYYYMMDD(text);
+    return Number.isInteger(dateInt) ? dateInt : null;
+}
+
 // Portfolio simulation endpoint
 app.post('/api/simulate', (req, res) => {
     const { amount, startDate, endDate, threshold, monthlyInvestment = 0, baseETF = 'QQQ', leveragedETF = 'TQQQ' } = req.body;
@@ -1538,22 +1887,48 @@ function executeSimulation(amount, startDate, endDate, threshold, monthlyInvestm
     });
 }
 
+// Helper function to find the first entry of date-sorted data on or after a YYYYMMDD date,
+// or the last entry if there is none. Binary search, so each lookup is O(log n).
+function findDataPointOnOrAfter(sortedData, date) {
+    let low = 0;
+    let high = sortedData.length;
+    while (low < high) {
+        const mid = (low + high) >>> 1;
+        if (sortedData[mid].date >= date) {
+            high = mid;
+        } else {
+            low = mid + 1;
+        }
+    }
+    return sortedData[Math.min(low, sortedData.length - 1)];
+}
+
 function calculatePortfolioSimulation(initialAmount, baseData, leveragedData, threshold, startDate, endDate, monthlyInvestment = 0, baseETF = 'QQQ', leveragedETF = 'TQQQ') {
     if (baseData.length === 0 || leveragedData.length === 0) {
         throw new Error('Insufficient data for simulation');
     }
 
+    // Dates are compared as YYYYMMDD integers, the same keys the price rows carry
+    const startDateKey = convertISODateToYYYYMMDD(startDate);
+    const endDateKey = convertISODateToYYYYMMDD(endDate);
+
     // Calculate time period
-    const startDateObj = new Date(startDate);
-    const endDateObj = new Date(endDate);
-    const durationDays = Math.ceil((endDateObj - startDateObj) / (1000 * 60 * 60 * 24));
+    const durationDays = daysBetweenYYYYMMDD(startDateKey, endDateKey);
     const durationYears = durationDays / 365.25;
 
+    // Index leveraged entries by date so aligning is one lookup per base entry
+    const leveragedByDate = new Map();
+    for (const entry of leveragedData) {
+        if (!leveragedByDate.has(entry.date)) {
+            leveragedByDate.set(entry.date, entry);
+        }
+    }
+
     // Create aligned data arrays
     const alignedData = [];
     for (let i = 0; i < baseData.length; i++) {
         const baseEntry = baseData[i];
-        const leveragedEntry = leveragedData.find(t => t.date === baseEntry.date);
+        const leveragedEntry = leveragedByDate.get(baseEntry.date);
         if (leveragedEntry) {
             alignedData.push({
                 date: baseEntry.date,
@@ -1573,13 +1948,19 @@ function calculatePortfolioSimulation(initialAmount, baseData, leveragedData, th
     // Generate monthly investment dates if monthly investment is enabled
     const monthlyInvestmentDates = [];
     if (monthlyInvestment > 0) {
-        let currentDate = new Date(startDateObj);
-        currentDate.setDate(1); // Start on the first of the month
-        currentDate.setMonth(currentDate.getMonth() + 1); // First investment is next month
-        
-        while (currentDate <= endDateObj) {
-            monthlyInvestmentDates.push(new Date(currentDate));
-            currentDate.setMonth(currentDate.getMonth() + 1);
+        // Investments fall on the first of each month, starting the month after startDate
+        let year = Math.floor(startDateKey / 10000);
+        let month = Math.floor(startDateKey / 100) % 100;
+        
+        for (;;) {
+            month++;
+            if (month > 12) {
+                month = 1;
+                year++;
+            }
+            const investDate = year * 10000 + month * 100 + 1;
+            if (investDate > endDateKey) break;
+            monthlyInvestmentDates.push(investDate);
         }
     }
 
@@ -1592,7 +1973,7 @@ function calculatePortfolioSimulation(initialAmount, baseData, leveragedData, th
     
     for (const investDate of monthlyInvestmentDates) {
         // Find the closest data point to the investment date
-        const dataPoint = alignedData.find(d => new Date(d.date) >= investDate) || alignedData[alignedData.length - 1];
+        const dataPoint = findDataPointOnOrAfter(alignedData, investDate);
         baseETFShares += monthlyInvestment / dataPoint[`${baseETF.toLowerCase()}_price`];
         baseETFTotalInvested += monthlyInvestment;
     }
@@ -1608,7 +1989,7 @@ function calculatePortfolioSimulation(initialAmount, baseData, leveragedData, th
     
     for (const investDate of monthlyInvestmentDates) {
         // Find the closest data point to the investment date
-        const dataPoint = alignedData.find(d => new Date(d.date) >= investDate) || alignedData[alignedData.length - 1];
+        const dataPoint = findDataPointOnOrAfter(alignedData, investDate);
         leveragedETFShares += monthlyInvestment / dataPoint[`${leveragedETF.toLowerCase()}_price`];
         leveragedETFTotalInvested += monthlyInvestment;
     }
@@ -1629,11 +2010,10 @@ function calculatePortfolioSimulation(initialAmount, baseData, leveragedData, th
     
     for (let i = 1; i < alignedData.length; i++) {
         const current = alignedData[i];
-        const currentDate = new Date(current.date);
         
         // Check if we need to make a monthly investment
         if (monthlyInvestmentIndex < monthlyInvestmentDates.length && 
-            currentDate >= monthlyInvestmentDates[monthlyInvestmentIndex]) {
+            current.date >= monthlyInvestmentDates[monthlyInvestmentIndex]) {
             
             // Add monthly investment to current position
             if (currentHolding === baseETF) {
@@ -2487,8 +2867,16 @@ app.post('/api/admin/upload-and-populate', upload.fields([
         });
     }
     
+    if (importInProgress) {
+        removeUploadedFiles(req);
+        return rejectConcurrentImport(res);
+    }
+    importInProgress = true;
+
+    let transactionOpen = false;
+    let droppedIndexes = null;
+
     try {
-        const uploadDir = path.join(__dirname, 'uploads');
         let csvFiles = [];
         
         // Handle compressed files
@@ -2502,23 +2890,16 @@ app.post('/api/admin/upload-and-populate', upload.fields([
                 
                 console.log(`Found ${zipEntries.length} entries in compressed archive`);
                 
-                // Extract and filter CSV files from zip with recursive search
+                // Collect CSV files from zip with recursive search. Entries are decompressed
+                // into memory when processed rather than written out to temporary files.
                 for (const entry of zipEntries) {
                     const fileName = entry.entryName.toLowerCase();
-                    console.log(`Checking entry: ${entry.entryName}`);
                     
                     if (fileName.endsWith('.csv') || fileName.endsWith('.txt')) {
-                        // Create a temporary file for processing
-                        const tempPath = path.join(uploadDir, `temp_${Date.now()}_${path.basename(entry.entryName)}`);
-                        fs.writeFileSync(tempPath, entry.getData());
-                        
                         csvFiles.push({
                             originalname: entry.entryName,
-                            path: tempPath,
-                            isTemp: true
+                            zipEntry: entry
                         });
-                        
-                        console.log(`✓ Extracted CSV file: ${entry.entryName}`);
                     }
                 }
                 
@@ -2561,12 +2942,35 @@ app.post('/api/admin/upload-and-populate', upload.fields([
         const errors = [];
         const processedSymbols = [];
         
+        // Symbols written since the last commit. They are registered and marked fresh with one
+        // set-based statement each just before the commit, instead of one insert per file.
+        const pendingSymbols = new Set();
+        const registerPendingSymbols = async () => {
+            if (pendingSymbols.size > 0) {
+                await insertSymbols(pendingSymbols);
+                await markSymbolsFresh([...pendingSymbols]);
+                pendingSymbols.clear();
+            }
+        };
+        
         // Process files in batches for better performance with large datasets
         const batchSize = 25; // Increased batch size for better performance
         const totalFiles = csvFiles.length;
         
         console.log(`Processing ${totalFiles} files in batches of ${batchSize}...`);
         
+        // Secondary indexes are dropped and rebuilt once at the end. A multi-batch upload would
+        // rebuild them over the whole table once per batch, and a small upload would rebuild them
+        // for a handful of rows, so only large single-request uploads do this.
+        if (!isBatchUpload && await shouldUseBulkLoad(totalFiles)) {
+            droppedIndexes = await beginBulkLoad();
+        }
+
+        // Files are written inside one transaction, committed every UPLOAD_COMMIT_INTERVAL files
+        await runSQL('BEGIN TRANSACTION');
+        transactionOpen = true;
+        let filesSinceCommit = 0;
+
         for (let i = 0; i < totalFiles; i += batchSize) {
             const batch = csvFiles.slice(i, i + batchSize);
             const currentBatch = Math.floor(i / batchSize) + 1;
@@ -2578,16 +2982,14 @@ app.post('/api/admin/upload-and-populate', upload.fields([
             // Process batch in parallel for better performance
             const batchPromises = batch.map(async (file) => {
                 try {
-                    const filePath = file.isTemp ? file.path : path.join(uploadDir, file.originalname);
-                    const result = await processCSVFile(filePath, convertToUppercase, preventDuplicates, file.originalname);
+                    const result = file.zipEntry
+                        ? await processCSVFile(null, convertToUppercase, preventDuplicates, file.originalname, file.zipEntry.getData())
+                        : await processCSVFile(file.path, convertToUppercase, preventDuplicates, file.originalname);
                     
                     if (result.symbolsAdded > 0) {
-                        // Extract symbol name from filename
-                        let symbol = path.basename(file.originalname, path.extname(file.originalname));
-                        // Clean symbol name (remove .US suffix)
-                        symbol = cleanSymbolName(symbol);
-                        const processedSymbol = convertToUppercase ? symbol.toUpperCase() : symbol;
-                        processedSymbols.push(processedSymbol);
+                        // Symbol was already cleaned and cased while processing the file
+                        processedSymbols.push(result.symbol);
+                        pendingSymbols.add(result.symbol);
                     }
                     
                     return { success: true, result, file: file.originalname };
@@ -2616,36 +3018,19 @@ app.post('/api/admin/upload-and-populate', upload.fields([
             const batchProgressInfo = isBatchUpload ? ` (Upload Batch ${batchNumber}/${totalBatches})` : '';
             console.log(`📊 Progress: ${progressPercent}% (${processedFiles}/${totalFiles} files) - Batch ${currentBatch}/${totalBatches} completed${batchProgressInfo}`);
             console.log(`📈 Current stats: ${totalSymbolsAdded} symbols, ${totalRecordsAdded} records added`);
-        }
-        
-        // Clean up uploaded files
-        const allFiles = [];
-        if (req.files.files) allFiles.push(...req.files.files);
-        if (req.files.compressedFiles) allFiles.push(...req.files.compressedFiles);
-        
-        for (const file of allFiles) {
-            try {
-                const filePath = path.join(uploadDir, file.originalname);
-                if (fs.existsSync(filePath)) {
-                    fs.unlinkSync(filePath);
-                }
-            } catch (error) {
-                console.warn(`Could not delete uploaded file ${file.originalname}:`, error.message);
-            }
-        }
-        
-        // Clean up temporary files from compressed archives
-        for (const file of csvFiles) {
-            if (file.isTemp && file.path) {
-                try {
-                    if (fs.existsSync(file.path)) {
-                        fs.unlinkSync(file.path);
-                    }
-                } catch (error) {
-                    console.warn(`Could not delete temporary file ${file.path}:`, error.message);
-                }
+
+            filesSinceCommit += batch.length;
+            if (filesSinceCommit >= UPLOAD_COMMIT_INTERVAL && i + batchSize < totalFiles) {
+                await registerPendingSymbols();
+                await runSQL('COMMIT');
+                await runSQL('BEGIN TRANSACTION');
+                filesSinceCommit = 0;
             }
         }
+
+        await registerPendingSymbols();
+        await runSQL('COMMIT');
+        transactionOpen = false;
         
         const folderInfo = folderName ? `from folder "${folderName}"` : 'from uploaded files';
         
@@ -2665,11 +3050,25 @@ app.post('/api/admin/upload-and-populate', upload.fields([
         
         } catch (error) {
             console.error('Error in upload-and-populate endpoint:', error);
+            if (transactionOpen) {
+                await runSQL('ROLLBACK').catch(rollbackError => {
+                    console.error('Error rolling back upload:', rollbackError);
+                });
+            }
             res.status(500).json({
                 status: 'error',
                 message: 'Internal server error during file processing',
                 error: error.message
             });
+        } finally {
+            if (droppedIndexes) {
+                await endBulkLoad(droppedIndexes).catch(restoreError => {
+                    console.error('Error restoring database settings after upload:', restoreError);
+                });
+            }
+            // Uploaded files are removed whether the upload succeeded, failed or was rejected
+            removeUploadedFiles(req);
+            importInProgress = false;
         }
 });
 
@@ -2757,6 +3156,11 @@ app.post('/api/admin/upload-structured-data', async (req, res) => {
         });
     }
     
+    if (importInProgress) {
+        return rejectConcurrentImport(res);
+    }
+    importInProgress = true;
+    
     console.log(`📊 Processing ${stocks.length} stocks from structured data upload`);
     console.log(`📈 Estimated total records: ${stocks.reduce((sum, stock) => sum + (stock.records?.length || 0), 0)}`);
     
@@ -2810,38 +3214,48 @@ app.post('/api/admin/upload-structured-data', async (req, res) => {
             let totalRecords = 0;
             
             allSymbols.forEach(({ symbol, records }) => {
+                // Dates are stored as YYYYMMDD integers; a TEXT date would sort after every
+                // integer and fall outside integer date ranges, so unreadable dates are skipped
+                let skippedDates = 0;
                 records.forEach(record => {
-                    allPriceRecords.push([symbol, record.date, record.open, record.high, record.low, record.close, record.volume]);
+                    const date = normalizePriceDate(record.date);
+                    if (date === null) {
+                        skippedDates++;
+                        return;
+                    }
+                    allPriceRecords.push([symbol, date, record.open, record.high, record.low, record.close, record.volume]);
+                    totalRecords++;
                 });
-                totalRecords += records.length;
+                if (skippedDates > 0) {
+                    errors.push(`${symbol}: skipped ${skippedDates} records with unrecognized dates`);
+                }
             });
             
             console.log(`📈 Prepared ${totalRecords} price records for ultra-bulk insert`);
             
-            // Step 4: Ultra-bulk insert all price records in optimal chunks
+            // Step 4: Ultra-bulk insert all price records in optimal chunks. Rows were already
+            // validated above; a chunk that hits a duplicate falls back to row-by-row inserts.
             if (allPriceRecords.length > 0) {
-                const chunkSize = 500; // Increased chunk size for better performance
+                const chunkSize = PRICE_INSERT_BATCH_SIZE;
                 let recordsInserted = 0;
                 
                 for (let i = 0; i < allPriceRecords.length; i += chunkSize) {
                     const chunk = allPriceRecords.slice(i, i + chunkSize);
-                    const placeholders = chunk.map(() => '(?, ?, ?, ?, ?, ?, ?)').join(', ');
-                    const values = chunk.flat();
                     
-                    await new Promise((resolve, reject) => {
-                        db.run(`
-                            INSERT INTO historical_prices (symbol, date, open, high, low, close, volume)
-                            VALUES ${placeholders}
-                        `, values, function(err) {
-                            if (err) {
-                                console.error(`❌ Error inserting price chunk ${Math.floor(i/chunkSize) + 1}:`, err);
-                                reject(err);
-                            } else {
-                                recordsInserted += this.changes || 0;
-                                resolve();
-                            }
-                        });
-                    });
+                    try {
+                        const { inserted, failures } = await insertPriceRowsWithFallback(chunk);
+                        recordsInserted += inserted;
+                        if (failures.length > 0) {
+                            // One entry per chunk keeps the response small when a whole upload repeats stored data
+                            const { row, error } = failures[0];
+                            const errorMsg = `Price chunk ${Math.floor(i/chunkSize) + 1}: skipped ${failures.length} rows (first: ${row[0]} ${row[1]}: ${error})`;
+                            errors.push(errorMsg);
+                            console.warn(`⚠️ ${errorMsg}`);
+                        }
+                    } catch (err) {
+                        console.error(`❌ Error inserting price chunk ${Math.floor(i/chunkSize) + 1}:`, err);
+                        throw err;
+                    }
                     
                     // Progress logging
                     if ((i + chunkSize) % (chunkSize * 10) === 0 || i + chunkSize >= allPriceRecords.length) {
@@ -2903,12 +3317,16 @@ app.post('/api/admin/upload-structured-data', async (req, res) => {
             message: 'Internal server error during structured data processing',
             error: error.message
         });
+    } finally {
+        importInProgress = false;
     }
 });
 
 // Populate database from folder endpoint
 app.post('/api/admin/populate-database', async (req, res) => {
     const { folderPath, convertToUppercase = true, preventDuplicates = true } = req.body;
+    // Form posts send the flag as a string, so only an explicit true enables the walk
+    const includeSubfolders = req.body.includeSubfolders === true || req.body.includeSubfolders === 'true';
     
     if (!folderPath) {
         return res.status(400).json({
@@ -2916,7 +3334,16 @@ app.post('/api/admin/populate-database', async (req, res) => {
             message: 'Folder path is required'
         });
     }
-    
+
+    if (importInProgress) {
+        return rejectConcurrentImport(res);
+    }
+    importInProgress = true;
+
+    let transactionOpen = false;
+    let droppedIndexes = null;
+    let insertRowsStatement = null;
+
     try {
         const fs = require('fs');
         const path = require('path');
@@ -2929,12 +3356,8 @@ app.post('/api/admin/populate-database', async (req, res) => {
             });
         }
         
-        // Read files from folder
-        const files = fs.readdirSync(folderPath);
-        const csvFiles = files.filter(file => 
-            file.toLowerCase().endsWith('.csv') || 
-            file.toLowerCase().endsWith('.txt')
-        );
+        // Read files from folder, and its subfolders if requested
+        const csvFiles = listPriceFiles(folderPath, includeSubfolders);
         
         if (csvFiles.length === 0) {
             return res.status(400).json({
@@ -2946,124 +3369,117 @@ app.post('/api/admin/populate-database', async (req, res) => {
         let totalSymbolsAdded = 0;
         let totalRecordsAdded = 0;
         let errors = [];
-        
-        // Process each file
+
+        // Serialized price rows (JSON array bodies) waiting to be written in the next batched insert
+        const pendingFragments = [];
+        let pendingRowCount = 0;
+
+        const flushPendingRows = async () => {
+            const rowsJSON = '[' + pendingFragments.join(',') + ']';
+            pendingFragments.length = 0;
+            pendingRowCount = 0;
+            await runStatement(insertRowsStatement, [rowsJSON]);
+        };
+
+        // Symbols already in the database, loaded once for duplicate checks
+        const existingSymbols = new Set();
+        if (preventDuplicates) {
+            const rows = await new Promise((resolve, reject) => {
+                db.all('SELECT symbol FROM symbols', (err, rows) => {
+                    if (err) reject(err);
+                    else resolve(rows);
+                });
+            });
+            for (const row of rows) {
+                existingSymbols.add(row.symbol);
+            }
+        }
+
+        // Resolve symbols and skip duplicates before handing files to the parser workers
+        const parseTasks = [];
+        const queuedSymbols = new Set();
+        let skippedDuplicates = 0;
+
         for (const file of csvFiles) {
+            // Extract symbol from filename (remove extension)
+            let symbol = path.basename(file, path.extname(file));
+
+            // Clean symbol name (remove .US suffix)
+            symbol = cleanSymbolName(symbol);
+
+            // Convert to uppercase if requested
+            if (convertToUppercase) {
+                symbol = symbol.toUpperCase();
+            }
+
+            // Check for duplicates if requested
+            if (preventDuplicates && (existingSymbols.has(symbol) || queuedSymbols.has(symbol))) {
+                skippedDuplicates++;
+                continue;
+            }
+
+            queuedSymbols.add(symbol);
+            parseTasks.push({ file, symbol, filePath: path.join(folderPath, file) });
+        }
+
+        // Bulk-load mode only pays for its index rebuild when there is enough to import
+        if (parseTasks.length > 0 && await shouldUseBulkLoad(parseTasks.length)) {
+            droppedIndexes = await beginBulkLoad();
+        }
+
+        // Every batch goes through one statement prepared for the whole import
+        insertRowsStatement = await prepareSQL(INSERT_SORTED_PRICE_ROWS_JSON_SQL);
+
+        // One transaction for the whole import so SQLite syncs to disk once
+        await runSQL('BEGIN TRANSACTION');
+        transactionOpen = true;
+
+        // Symbols of successfully parsed files, registered and marked fresh once at the end
+        const importedSymbols = new Set();
+
+        // Files are parsed on worker threads; results are written here one file at a time
+        await parsePriceFilesInWorkers(parseTasks, async ({ file, symbol }, { rowCount, rowsJSON, error: parseError }) => {
             try {
-                const filePath = path.join(folderPath, file);
-                const fileContent = fs.readFileSync(filePath, 'utf8');
-                
-                // Extract symbol from filename (remove extension)
-                let symbol = path.basename(file, path.extname(file));
-                
-                // Clean symbol name (remove .US suffix)
-                symbol = cleanSymbolName(symbol);
-                
-                // Convert to uppercase if requested
-                if (convertToUppercase) {
-                    symbol = symbol.toUpperCase();
-                }
-                
-                // Check for duplicates if requested
-                if (preventDuplicates) {
-                    const existingSymbol = await new Promise((resolve, reject) => {
-                        db.get('SELECT symbol FROM symbols WHERE symbol = ?', [symbol], (err, row) => {
-                            if (err) reject(err);
-                            else resolve(row);
-                        });
-                    });
-                    
-                    if (existingSymbol) {
-                        console.log(`Skipping duplicate symbol: ${symbol}`);
-                        continue;
-                    }
-                }
-                
-                // Parse CSV content
-                const lines = fileContent.trim().split('\n');
-                const headers = lines[0].split(',');
-                
-                // Find column indices
-                const dateIndex = headers.findIndex(h => h.toLowerCase().includes('date'));
-                const openIndex = headers.findIndex(h => h.toLowerCase().includes('open'));
-                const highIndex = headers.findIndex(h => h.toLowerCase().includes('high'));
-                const lowIndex = headers.findIndex(h => h.toLowerCase().includes('low'));
-                const closeIndex = headers.findIndex(h => h.toLowerCase().includes('close'));
-                const volumeIndex = headers.findIndex(h => h.toLowerCase().includes('vol'));
-                
-                if (dateIndex === -1 || closeIndex === -1) {
-                    errors.push(`File ${file}: Missing required columns (date, close)`);
-                    continue;
+                if (parseError) {
+                    errors.push(`File ${file}: ${parseError}`);
+                    return;
                 }
-                
-                // Process data rows
-                const dataRows = lines.slice(1).filter(line => line.trim() && !line.includes('N/A'));
-                
-                if (dataRows.length === 0) {
-                    errors.push(`File ${file}: No valid data rows found`);
-                    continue;
+
+                importedSymbols.add(symbol);
+
+                // Queue price data for batched insert - the worker already serialized it
+                if (rowCount > 0) {
+                    pendingFragments.push(rowsJSON.slice(1, -1));
+                    pendingRowCount += rowCount;
                 }
-                
-                // Insert symbol into symbols table
-                await new Promise((resolve, reject) => {
-                    db.run(`
-                        INSERT OR IGNORE INTO symbols (symbol, name, sector, market_cap, exchange, is_active)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    `, [symbol, symbol, 'Unknown', 'Unknown', 'NASDAQ', 1], (err) => {
-                        if (err) reject(err);
-                        else resolve();
-                    });
-                });
-                
-                // Insert price data
-                let recordsInserted = 0;
-                for (const line of dataRows) {
-                    const values = line.split(',');
-                    if (values.length >= Math.max(dateIndex, openIndex, highIndex, lowIndex, closeIndex, volumeIndex) + 1) {
-                        const date = values[dateIndex];
-                        const open = parseFloat(values[openIndex]) || null;
-                        const high = parseFloat(values[highIndex]) || null;
-                        const low = parseFloat(values[lowIndex]) || null;
-                        const close = parseFloat(values[closeIndex]) || null;
-                        const volume = parseInt(values[volumeIndex]) || null;
-                        
-                        if (date && close && !isNaN(close)) {
-                            await new Promise((resolve, reject) => {
-                                db.run(`
-                                    INSERT OR IGNORE INTO historical_prices (symbol, date, open, high, low, close, volume)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                                `, [symbol, date, open, high, low, close, volume], (err) => {
-                                    if (err) reject(err);
-                                    else resolve();
-                                });
-                            });
-                            recordsInserted++;
-                        }
-                    }
+
+                if (pendingRowCount >= PRICE_INSERT_BATCH_SIZE) {
+                    await flushPendingRows();
                 }
-                
-                // Update data freshness
-                await new Promise((resolve, reject) => {
-                    db.run(`
-                        INSERT OR REPLACE INTO data_freshness (symbol, last_updated, status, error_count)
-                        VALUES (?, CURRENT_TIMESTAMP, 'active', 0)
-                    `, [symbol], (err) => {
-                        if (err) reject(err);
-                        else resolve();
-                    });
-                });
-                
+
                 totalSymbolsAdded++;
-                totalRecordsAdded += recordsInserted;
-                
-                console.log(`✓ Processed ${file}: ${symbol} - ${recordsInserted} records`);
-                
+                totalRecordsAdded += rowCount;
             } catch (error) {
                 errors.push(`File ${file}: ${error.message}`);
-                console.error(`Error processing file ${file}:`, error);
             }
+        });
+
+        // Flush the final partial batch
+        if (pendingRowCount > 0) {
+            await flushPendingRows();
         }
-        
+
+        if (importedSymbols.size > 0) {
+            const symbols = [...importedSymbols];
+            await insertSymbols(symbols);
+            await markSymbolsFresh(symbols);
+        }
+
+        await runSQL('COMMIT');
+        transactionOpen = false;
+
+        console.log(`✓ Imported ${totalSymbolsAdded} symbols (${totalRecordsAdded} records) from ${csvFiles.length} files - ${skippedDuplicates} duplicates skipped, ${errors.length} errors`);
+
         res.json({
             status: 'success',
             message: `Database populated successfully`,
@@ -3073,16 +3489,32 @@ app.post('/api/admin/populate-database', async (req, res) => {
             errors: errors,
             folderPath: folderPath,
             convertToUppercase: convertToUppercase,
-            preventDuplicates: preventDuplicates
+            preventDuplicates: preventDuplicates,
+            includeSubfolders: includeSubfolders
         });
         
     } catch (error) {
         console.error('Error populating database:', error);
+        if (transactionOpen) {
+            await runSQL('ROLLBACK').catch(rollbackError => {
+                console.error('Error rolling back import:', rollbackError);
+            });
+        }
         res.status(500).json({
             status: 'error',
             message: 'Failed to populate database',
             error: error.message
         });
+    } finally {
+        if (insertRowsStatement) {
+            await finalizeStatement(insertRowsStatement);
+        }
+        if (droppedIndexes) {
+            await endBulkLoad(droppedIndexes).catch(restoreError => {
+                console.error('Error restoring database settings after import:', restoreError);
+            });
+        }
+        importInProgress = false;
     }
 });
 
@@ -3402,12 +3834,7 @@ const SKIP_POPULATION = process.env.SKIP_POPULATION === 'true' || process.argv.i
 // Function to add symbol to database
 async function addSymbolToDatabase(symbol, type, exchange) {
     return new Promise((resolve, reject) => {
-        const stmt = db.prepare(`
-            INSERT OR IGNORE INTO symbols (symbol, name, sector, market_cap, exchange, is_active)
-            VALUES (?, ?, ?, ?, ?, ?)
-        `);
-        
-        stmt.run(symbol, `${symbol} ${type}`, type.toUpperCase(), 'Unknown', exchange.toUpperCase(), 1, (err) => {
+        cachedStatement(INSERT_SYMBOL_SQL).run(symbol, `${symbol} ${type}`, type.toUpperCase(), 'Unknown', exchange.toUpperCase(), 1, (err) => {
             if (err) reject(err);
             else resolve();
         });
@@ -3507,21 +3934,13 @@ async function fetchAndStoreHistoricalData(symbol) {
                 let updatedRows = 0;
                 
                 // Prepare statements
-                const insertStmt = db.prepare(`
-                    INSERT OR REPLACE INTO historical_prices (symbol, date, open, high, low, close, volume)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                `);
+                const insertStmt = cachedStatement(REPLACE_PRICE_ROW_SQL);
                 
                 // Process each data row
                 for (const row of historicalData) {
                     if (row.date && row.close && !isNaN(row.close)) {
                         // Check if this date already exists
-                        const existingQuery = `
-                            SELECT COUNT(*) as record_count FROM historical_prices 
-                            WHERE symbol = ? AND date = ?
-                        `;
-                        
-                        db.get(existingQuery, [symbol.toUpperCase(), row.date], (err, existing) => {
+                        getCached(COUNT_PRICE_ON_DATE_SQL, [symbol.toUpperCase(), row.date], (err, existing) => {
                             if (err) {
                                 console.log(`⚠️ Error checking existing data for ${symbol} ${row.date}: ${err.message}`);
                                 return;
@@ -3548,11 +3967,7 @@ async function fetchAndStoreHistoricalData(symbol) {
                 }
                 
                 // Update freshness
-                const upsertFreshness = db.prepare(`
-                    INSERT OR REPLACE INTO data_freshness (symbol, last_updated, status, error_count)
-                    VALUES (?, CURRENT_TIMESTAMP, 'active', 0)
-                `);
-                upsertFreshness.run(symbol.toUpperCase());
+                cachedStatement(MARK_SYMBOL_FRESH_SQL).run(symbol.toUpperCase());
                 
                 const totalProcessed = insertedRows + updatedRows;
                 console.log(`✅ ${symbol}: Processed ${totalProcessed} records (${insertedRows} new, ${updatedRows} updated)`);
@@ -3564,11 +3979,7 @@ async function fetchAndStoreHistoricalData(symbol) {
     } catch (error) {
         // Update error count in freshness table
         try {
-            const updateErrorStmt = db.prepare(`
-                INSERT OR REPLACE INTO data_freshness (symbol, last_updated, status, error_count)
-                VALUES (?, CURRENT_TIMESTAMP, 'error', COALESCE((SELECT error_count FROM data_freshness WHERE symbol = ?), 0) + 1)
-            `);
-            updateErrorStmt.run(symbol.toUpperCase(), symbol.toUpperCase());
+            cachedStatement(MARK_SYMBOL_ERROR_SQL).run(symbol.toUpperCase(), symbol.toUpperCase());
         } catch (dbError) {
             console.log(`⚠️ Failed to update error count for ${symbol}: ${dbError.message}`);
         }
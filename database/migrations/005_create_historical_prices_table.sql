@@ -5,7 +5,7 @@
 CREATE TABLE IF NOT EXISTS historical_prices (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     symbol TEXT NOT NULL,
-    date DATE NOT NULL,
+    date INTEGER NOT NULL,
     open REAL,
     high REAL,
     low REAL,
@@ -17,10 +17,11 @@ CREATE TABLE IF NOT EXISTS historical_prices (
 );
 
 -- Create indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_historical_prices_symbol ON historical_prices(symbol);
 CREATE INDEX IF NOT EXISTS idx_historical_prices_date ON historical_prices(date);
-CREATE INDEX IF NOT EXISTS idx_historical_prices_symbol_date ON historical_prices(symbol, date);
 CREATE INDEX IF NOT EXISTS idx_historical_prices_close ON historical_prices(close);
+CREATE INDEX IF NOT EXISTS idx_historical_prices_symbol_date_close ON historical_prices(symbol, date, close);
+DROP INDEX IF EXISTS idx_historical_prices_symbol_date;
+DROP INDEX IF EXISTS idx_historical_prices_symbol;
 
 -- Create a view for latest prices (useful for quick symbol validation)
 CREATE VIEW IF NOT EXISTS latest_prices AS
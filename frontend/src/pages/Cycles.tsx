@@ -1,8 +1,9 @@
-import React, { useEffect, useState } from 'react'
+import React, { useEffect, useMemo, useState } from 'react'
 import { Download, Search, TrendingDown, X, Calendar, TrendingUp } from 'lucide-react'
 import { useThreshold } from '../contexts/ThresholdContext'
 import { useData } from '../contexts/DataContext'
 import { useETF } from '../contexts/ETFContext'
+import { convertYYYYMMDDToDate, formatDateForChart, formatDateForDisplay } from '../utils/dateUtils'
 import {
   ResponsiveContainer,
   ComposedChart,
@@ -15,6 +16,17 @@ import {
   ReferenceArea
 } from 'recharts'
 
+// Built once and shared by the analysis panel prices and the cycle chart's reference-line labels
+const priceFormat = new Intl.NumberFormat('en-US', {
+  style: 'currency',
+  currency: 'USD',
+  minimumFractionDigits: 2,
+  maximumFractionDigits: 2
+})
+
+// Days of context shown either side of the selected cycle in its chart
+const CYCLE_CHART_PADDING_DAYS = 30
+
 interface CyclesProps {
   selectedSymbol?: string;
 }
@@ -152,8 +164,8 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
       const matchesSearch = 
         cycle.cycle_number.toString().includes(searchTerm) ||
         cycle.severity.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        cycle.ath_date.includes(searchTerm) ||
-        cycle.low_date.includes(searchTerm)
+        String(cycle.ath_date).includes(searchTerm) ||
+        String(cycle.low_date).includes(searchTerm)
       
       const matchesSeverity = severityFilter === 'all' || cycle.severity.toLowerCase() === severityFilter.toLowerCase()
       
@@ -226,65 +238,38 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
     return colors[severity.toLowerCase() as keyof typeof colors] || 'bg-blue-100 text-blue-800'
   }
 
-  const formatDate = (dateString: string) => {
-    return new Date(dateString).toLocaleDateString('en-US', {
-      year: 'numeric',
-      month: 'short',
-      day: 'numeric'
-    })
-  }
-
-  const formatPrice = (price: number) => {
-    return new Intl.NumberFormat('en-US', {
-      style: 'currency',
-      currency: 'USD'
-    }).format(price)
-  }
+  const formatPrice = (price: number) => priceFormat.format(price)
 
+  // Cycle dates are YYYYMMDD integers; rounding absorbs daylight-saving hour shifts
   const calculateDuration = (startDate: string, endDate: string) => {
     if (!startDate || !endDate) return 0
-    const start = new Date(startDate)
-    const end = new Date(endDate)
+    const start = convertYYYYMMDDToDate(startDate)
+    const end = convertYYYYMMDDToDate(endDate)
     const diffTime = Math.abs(end.getTime() - start.getTime())
-    const diffDays = Math.ceil(diffTime / (1000 * 60 * 60 * 24))
+    const diffDays = Math.round(diffTime / (1000 * 60 * 60 * 24))
     return diffDays
   }
 
-  // Chart helper functions
-  const formatChartDate = (dateString: string) => {
-    return new Date(dateString).toLocaleDateString('en-US', {
-      year: 'numeric',
-      month: 'short',
-      day: 'numeric'
-    })
-  }
-
-  const formatChartPrice = (price: number) => {
-    return new Intl.NumberFormat('en-US', {
-      style: 'currency',
-      currency: 'USD',
-      minimumFractionDigits: 2,
-      maximumFractionDigits: 2
-    }).format(price)
-  }
-
-  // Get filtered chart data for the selected cycle period
-  const getCycleChartData = () => {
+  // Chart data for the selected cycle period, filtered in one pass when the selection or
+  // data changes rather than on every render of the chart and its annotations
+  const cycleChartData = useMemo(() => {
     if (!chartData || !selectedCycle) return []
     
-    const cycleStart = new Date(selectedCycle.ath_date)
-    const cycleEnd = selectedCycle.recovery_date ? new Date(selectedCycle.recovery_date) : new Date()
+    const cycleStart = convertYYYYMMDDToDate(selectedCycle.ath_date).getTime()
+    const cycleEnd = selectedCycle.recovery_date
+      ? convertYYYYMMDDToDate(selectedCycle.recovery_date).getTime()
+      : Date.now()
     
     // Add some padding before and after the cycle for context
-    const paddingDays = 30
-    const paddedStart = new Date(cycleStart.getTime() - (paddingDays * 24 * 60 * 60 * 1000))
-    const paddedEnd = new Date(cycleEnd.getTime() + (paddingDays * 24 * 60 * 60 * 1000))
+    const paddingMs = CYCLE_CHART_PADDING_DAYS * 24 * 60 * 60 * 1000
+    const paddedStart = cycleStart - paddingMs
+    const paddedEnd = cycleEnd + paddingMs
     
     return chartData.data.filter((point: any) => {
-      const pointDate = new Date(point.date)
-      return pointDate >= paddedStart && pointDate <= paddedEnd
+      const pointTime = convertYYYYMMDDToDate(point.date).getTime()
+      return pointTime >= paddedStart && pointTime <= paddedEnd
     })
-  }
+  }, [chartData, selectedCycle])
 
   if (isLoading) {
     return (
@@ -462,13 +447,13 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                     </span>
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
-                      {new Date(cycle.ath_date).toLocaleDateString()}
+                      {convertYYYYMMDDToDate(cycle.ath_date).toLocaleDateString()}
                     </td>
                     <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
                       ${cycle.ath_price.toFixed(2)}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
-                      {new Date(cycle.low_date).toLocaleDateString()}
+                      {convertYYYYMMDDToDate(cycle.low_date).toLocaleDateString()}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
                       ${cycle.low_price.toFixed(2)}
@@ -502,7 +487,7 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                             <div>
                               <h4 className="text-lg font-semibold text-gray-900 flex items-center">
                                 <Calendar className="w-5 h-5 mr-2 text-blue-500" />
-                                Cycle {selectedCycle.cycle_number} Analysis - {formatDate(selectedCycle.ath_date)}
+                                Cycle {selectedCycle.cycle_number} Analysis - {formatDateForDisplay(selectedCycle.ath_date)}
                               </h4>
                               <p className="text-gray-600 mt-1">
                                 Detailed breakdown of this {selectedCycle.severity.toLowerCase()} drawdown cycle
@@ -528,7 +513,7 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                                 </h5>
                                 <div className="bg-green-50 border border-green-200 p-3 rounded-lg">
                                   <p className="text-xl font-bold text-green-600">{formatPrice(selectedCycle.ath_price)}</p>
-                                  <p className="text-xs text-gray-600">{formatDate(selectedCycle.ath_date)}</p>
+                                  <p className="text-xs text-gray-600">{formatDateForDisplay(selectedCycle.ath_date)}</p>
                                 </div>
                               </div>
 
@@ -540,7 +525,7 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                                 </h5>
                                 <div className="bg-red-50 border border-red-200 p-3 rounded-lg">
                                   <p className="text-xl font-bold text-red-600">{formatPrice(selectedCycle.low_price)}</p>
-                                  <p className="text-xs text-gray-600">{formatDate(selectedCycle.low_date)}</p>
+                                  <p className="text-xs text-gray-600">{formatDateForDisplay(selectedCycle.low_date)}</p>
                                   <p className="text-xs text-red-600 font-medium">
                                     {selectedCycle.drawdown_pct.toFixed(1)}% drawdown
                                   </p>
@@ -558,7 +543,7 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                                     {selectedCycle.recovery_price ? formatPrice(selectedCycle.recovery_price) : 'Ongoing'}
                                   </p>
                                   <p className="text-xs text-gray-600">
-                                    {selectedCycle.recovery_date ? formatDate(selectedCycle.recovery_date) : 'Not recovered yet'}
+                                    {selectedCycle.recovery_date ? formatDateForDisplay(selectedCycle.recovery_date) : 'Not recovered yet'}
                                   </p>
                                 </div>
                               </div>
@@ -697,11 +682,11 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                                 <div className="bg-white border border-gray-200 rounded-lg p-4">
                                   <div className="h-80">
                                     <ResponsiveContainer width="100%" height="100%">
-                                      <ComposedChart data={getCycleChartData()}>
+                                      <ComposedChart data={cycleChartData}>
                                         <CartesianGrid strokeDasharray="3 3" stroke="#f0f0f0" />
                                         <XAxis 
                                           dataKey="date" 
-                                          tickFormatter={(value) => formatChartDate(value)}
+                                          tickFormatter={(value) => formatDateForChart(value)}
                                           tick={{ fontSize: 10 }}
                                           stroke="#6b7280"
                                         />
@@ -717,7 +702,7 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                                               const formattedValue = typeof value === 'number' ? value.toFixed(2) : String(value);
                                               return (
                                                 <div className="bg-white p-3 border border-gray-200 rounded-lg shadow-lg">
-                                                  <p className="font-medium text-gray-900">{formatChartDate(label)}</p>
+                                                  <p className="font-medium text-gray-900">{formatDateForChart(label)}</p>
                                                   <p className="text-blue-600">{selectedETF}: ${formattedValue}</p>
                                                 </div>
                                               )
@@ -741,7 +726,7 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                                           strokeDasharray="3 3"
                                           strokeWidth={2}
                                           label={{
-                                            value: `ATH: ${formatChartPrice(selectedCycle.ath_price)}`,
+                                            value: `ATH: ${formatPrice(selectedCycle.ath_price)}`,
                                             position: 'top',
                                             fill: '#ef4444',
                                             fontSize: 10
@@ -753,7 +738,7 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                                           strokeDasharray="3 3"
                                           strokeWidth={2}
                                           label={{
-                                            value: `Low: ${formatChartPrice(selectedCycle.low_price)}`,
+                                            value: `Low: ${formatPrice(selectedCycle.low_price)}`,
                                             position: 'bottom',
                                             fill: '#dc2626',
                                             fontSize: 10
@@ -766,7 +751,7 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                                             strokeDasharray="3 3"
                                             strokeWidth={2}
                                             label={{
-                                              value: `Recovery: ${formatChartPrice(selectedCycle.recovery_price)}`,
+                                              value: `Recovery: ${formatPrice(selectedCycle.recovery_price)}`,
                                               position: 'top',
                                               fill: '#059669',
                                               fontSize: 10
@@ -777,7 +762,7 @@ export default function Cycles({ selectedSymbol }: CyclesProps) {
                                         {/* Highlight the cycle period */}
                                         <ReferenceArea
                                           x1={selectedCycle.ath_date}
-                                          x2={selectedCycle.recovery_date || new Date().toISOString().split('T')[0]}
+                                          x2={selectedCycle.recovery_date || cycleChartData[cycleChartData.length - 1]?.date}
                                           fill="#fef3c7"
                                           fillOpacity={0.3}
                                           stroke="none"
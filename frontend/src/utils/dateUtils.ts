@@ -1,24 +1,29 @@
 // Date conversion utility - converts YYYYMMDD integers to JavaScript Date objects
 export const convertYYYYMMDDToDate = (dateInt: number | string): Date => {
-  const dateStr = dateInt.toString()
-  const year = parseInt(dateStr.substring(0, 4))
-  const month = parseInt(dateStr.substring(4, 6)) - 1 // Month is 0-indexed in JavaScript
-  const day = parseInt(dateStr.substring(6, 8))
+  const value = typeof dateInt === 'number' ? dateInt : parseInt(dateInt)
+  const year = Math.floor(value / 10000)
+  const month = Math.floor(value / 100) % 100 - 1 // Month is 0-indexed in JavaScript
+  const day = value % 100
   return new Date(year, month, day)
 }
 
+// Formatters are built once; toLocaleDateString with options builds a new one on every call
+const chartDateFormat = new Intl.DateTimeFormat('en-US', {
+  year: 'numeric',
+  month: 'short',
+  day: 'numeric'
+})
+
+const displayDateFormat = new Intl.DateTimeFormat('en-US', {
+  year: 'numeric',
+  month: 'long',
+  day: 'numeric'
+})
+
 export const formatDateForChart = (dateInt: number | string): string => {
-  return convertYYYYMMDDToDate(dateInt).toLocaleDateString('en-US', {
-    year: 'numeric',
-    month: 'short',
-    day: 'numeric'
-  })
+  return chartDateFormat.format(convertYYYYMMDDToDate(dateInt))
 }
 
 export const formatDateForDisplay = (dateInt: number | string): string => {
-  return convertYYYYMMDDToDate(dateInt).toLocaleDateString('en-US', {
-    year: 'numeric',
-    month: 'long',
-    day: 'numeric'
-  })
+  return displayDateFormat.format(convertYYYYMMDDToDate(dateInt))
 }